@@ -1,91 +1,80 @@
 import os
-import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 import folder_paths
 import comfy.sd
 import comfy.utils
 import torch
-
-def short_hash(path):
-    if not os.path.exists(path):
-        return "no_file"
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            h.update(chunk)
-    return h.hexdigest()[:10]
-
-def load_single_lora(model, clip, lora_name, weight):
-    lora_path = folder_paths.get_full_path("loras", lora_name)
-    if not lora_path or not os.path.exists(lora_path):
-        return model, clip
-    lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
-    model, clip = comfy.sd.load_lora_for_models(model, clip, lora, weight, weight)
-    return model, clip
+from .MangoHashing import short_sha256 as short_hash
+from .MangoModelCache import VAES, file_cache_key, load_lora_state_dict
+from .MangoLoraStack import make_lora_entry
+from .MangoPrefetch import PREFETCHER
+
+# Upper bound on component files read at once by load_all.
+LOADER_THREADS = max(1, int(os.environ.get("MANGO_LOADER_THREADS", "4")))
+
+# TAESD name -> (encoder prefix, decoder prefix, (vae_scale, vae_shift))
+TAESD_MODELS = {
+    "taesd": ("taesd_encoder", "taesd_decoder", (0.18215, 0.0)),
+    "taesdxl": ("taesdxl_encoder", "taesdxl_decoder", (0.13025, 0.0)),
+    "taesd3": ("taesd3_encoder", "taesd3_decoder", (1.5305, 0.0609)),
+    "taef1": ("taef1_encoder", "taef1_decoder", (0.3611, 0.1159)),
+}
 
 class CompositeMangoLoader:
     @staticmethod
     def vae_list():
         vaes = folder_paths.get_filename_list("vae")
         approx_vaes = folder_paths.get_filename_list("vae_approx")
-        taesd_combinations = {
-            "taesd": ("taesd_encoder", "taesd_decoder"),
-            "taesdxl": ("taesdxl_encoder", "taesdxl_decoder"),
-            "taesd3": ("taesd3_encoder", "taesd3_decoder"),
-            "taef1": ("taef1_encoder", "taef1_decoder")
-        }
-        for name, (enc_prefix, dec_prefix) in taesd_combinations.items():
+        for name, (enc_prefix, dec_prefix, _) in TAESD_MODELS.items():
             if any(v.startswith(enc_prefix) for v in approx_vaes) and any(v.startswith(dec_prefix) for v in approx_vaes):
                 vaes.append(name)
         return vaes
 
     @staticmethod
-    def load_taesd(name):
-        sd = {}
+    def taesd_paths(name):
         approx_vaes = folder_paths.get_filename_list("vae_approx")
-        enc_prefix, dec_prefix = {
-            "taesd": ("taesd_encoder", "taesd_decoder"),
-            "taesdxl": ("taesdxl_encoder", "taesdxl_decoder"),
-            "taesd3": ("taesd3_encoder", "taesd3_decoder"),
-            "taef1": ("taef1_encoder", "taef1_decoder")
-        }[name]
-
+        enc_prefix, dec_prefix, _ = TAESD_MODELS[name]
         encoder = next(v for v in approx_vaes if v.startswith(enc_prefix))
         decoder = next(v for v in approx_vaes if v.startswith(dec_prefix))
+        return folder_paths.get_full_path("vae_approx", encoder), folder_paths.get_full_path("vae_approx", decoder)
 
-        enc = comfy.utils.load_torch_file(folder_paths.get_full_path("vae_approx", encoder))
-        dec = comfy.utils.load_torch_file(folder_paths.get_full_path("vae_approx", decoder))
+    @classmethod
+    def load_taesd(cls, name, paths=None):
+        sd = {}
+        enc_prefix, dec_prefix, (scale, shift) = TAESD_MODELS[name]
+        enc_path, dec_path = paths or cls.taesd_paths(name)
+
+        enc = comfy.utils.load_torch_file(enc_path)
+        dec = comfy.utils.load_torch_file(dec_path)
 
         for k in enc: sd[f"{enc_prefix}.{k}"] = enc[k]
         for k in dec: sd[f"{dec_prefix}.{k}"] = dec[k]
 
-        sd.update({
-            "taesd": (0.18215, 0.0),
-            "taesdxl": (0.13025, 0.0),
-            "taesd3": (1.5305, 0.0609),
-            "taef1": (0.3611, 0.1159)
-        }[name])
-        sd["vae_scale"], sd["vae_shift"] = torch.tensor(sd["vae_scale"]), torch.tensor(sd["vae_shift"])
+        sd["vae_scale"], sd["vae_shift"] = torch.tensor(scale), torch.tensor(shift)
         return sd
 
     @classmethod
     def INPUT_TYPES(cls):
+        loras = ["None"] + folder_paths.get_filename_list("loras")
+        text_encoders = folder_paths.get_filename_list("text_encoders")
         return {
             "required": {
                 "unet_name": (folder_paths.get_filename_list("diffusion_models"),),
                 "weight_dtype": (["default", "fp8_e4m3fn", "fp8_e4m3fn_fast", "fp8_e5m2"],),
-                "clip_name1": (folder_paths.get_filename_list("text_encoders"),),
-                "clip_name2": (folder_paths.get_filename_list("text_encoders"),),
+                "clip_name1": (text_encoders,),
+                "clip_name2": (text_encoders,),
                 "type": (["sdxl", "sd3", "flux", "hunyuan_video"],),
                 "vae_name": (cls.vae_list(),),
-                "LoraName1": (["None"] + folder_paths.get_filename_list("loras"), {"default": "None"}),
+                "LoraName1": (loras, {"default": "None"}),
                 "LoraWeight1": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05}),
-                "LoraName2": (["None"] + folder_paths.get_filename_list("loras"), {"default": "None"}),
+                "LoraName2": (loras, {"default": "None"}),
                 "LoraWeight2": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05}),
-                "LoraName3": (["None"] + folder_paths.get_filename_list("loras"), {"default": "None"}),
+                "LoraName3": (loras, {"default": "None"}),
                 "LoraWeight3": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05}),
-                "LoraName4": (["None"] + folder_paths.get_filename_list("loras"), {"default": "None"}),
+                "LoraName4": (loras, {"default": "None"}),
                 "LoraWeight4": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05}),
-                "LoraName5": (["None"] + folder_paths.get_filename_list("loras"), {"default": "None"}),
+                "LoraName5": (loras, {"default": "None"}),
                 "LoraWeight5": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05}),
             },
             "optional": {
@@ -98,48 +87,101 @@ class CompositeMangoLoader:
     FUNCTION = "load_all"
     CATEGORY = "Mango Node Pack/Loaders"
 
+    @classmethod
+    def load_vae(cls, vae_name):
+        """Build the VAE, reusing the cached one while its files are unchanged."""
+        if vae_name in TAESD_MODELS:
+            paths = cls.taesd_paths(vae_name)
+            key = (vae_name,) + tuple(file_cache_key(p) for p in paths)
+        else:
+            vae_path = folder_paths.get_full_path_or_raise("vae", vae_name)
+            key = file_cache_key(vae_path)
+        vae = VAES.get(key)
+        if vae is not None:
+            return vae
+        if vae_name in TAESD_MODELS:
+            vae_sd = cls.load_taesd(vae_name, paths)
+        else:
+            PREFETCHER.note_load(vae_path)
+            vae_sd = comfy.utils.load_torch_file(vae_path)
+        vae = comfy.sd.VAE(sd=vae_sd)
+        VAES.discard_path(key[0])
+        VAES.put(key, vae, 1)
+        return vae
+
     def load_all(self, unet_name, weight_dtype, clip_name1, clip_name2, type, vae_name, device="default", **kwargs):
-        # Load UNET
+        started = time.perf_counter()
+
+        # UNET
         model_options = {}
         if weight_dtype.startswith("fp8"):
             model_options["dtype"] = getattr(torch, f"float{weight_dtype[2:]}")
         if "fast" in weight_dtype:
             model_options["fp8_optimizations"] = True
-
         unet_path = folder_paths.get_full_path_or_raise("diffusion_models", unet_name)
-        unet_hash = short_hash(unet_path)
-        model = comfy.sd.load_diffusion_model(unet_path, model_options=model_options)
 
-        # Load Dual CLIP
+        # Dual CLIP
         clip_path1 = folder_paths.get_full_path_or_raise("text_encoders", clip_name1)
         clip_path2 = folder_paths.get_full_path_or_raise("text_encoders", clip_name2)
         clip_type = getattr(comfy.sd.CLIPType, type.upper())
-
         model_options_clip = {}
         if device == "cpu":
             model_options_clip.update({"load_device": "cpu", "offload_device": "cpu"})
 
-        clip = comfy.sd.load_clip(
-            ckpt_paths=[clip_path1, clip_path2],
-            clip_type=clip_type,
-            model_options=model_options_clip
-        )
-
-        # Load VAE
-        if vae_name in ["taesd", "taesdxl", "taesd3", "taef1"]:
-            vae_sd = self.load_taesd(vae_name)
-        else:
-            vae_path = folder_paths.get_full_path_or_raise("vae", vae_name)
-            vae_sd = comfy.utils.load_torch_file(vae_path)
-        vae = comfy.sd.VAE(sd=vae_sd)
-
-        # Apply LORAs
-        lora_stack = []
+        # LoRAs, in stack order; they are hashed in the pool below.
+        lora_specs = []
         for i in range(1, 6):
             lora_name = kwargs.get(f"LoraName{i}")
             lora_weight = kwargs.get(f"LoraWeight{i}", 1.0)
             if lora_name and lora_name != "None":
-                model, clip = load_single_lora(model, clip, lora_name, lora_weight)
-                lora_stack.append((lora_name, lora_weight, lora_weight))
+                lora_specs.append((lora_name, lora_weight))
+
+        for path in (unet_path, clip_path1, clip_path2):
+            PREFETCHER.note_load(path)
+
+        # The components are independent reads, so load them concurrently and
+        # assemble in a fixed order afterwards.
+        jobs = {
+            "unet": lambda: comfy.sd.load_diffusion_model(unet_path, model_options=model_options),
+            "unet hash": lambda: short_hash(unet_path),
+            "clip": lambda: comfy.sd.load_clip(
+                ckpt_paths=[clip_path1, clip_path2],
+                clip_type=clip_type,
+                model_options=model_options_clip
+            ),
+            "vae": lambda: self.load_vae(vae_name),
+        }
+        for i, (lora_name, lora_weight) in enumerate(lora_specs):
+            jobs[f"lora {i + 1} hash"] = (lambda n=lora_name, w=lora_weight: make_lora_entry(n, w, w))
+            lora_path = folder_paths.get_full_path("loras", lora_name)
+            if lora_path and os.path.exists(lora_path):
+                jobs[f"lora {i + 1}"] = (lambda p=lora_path: load_lora_state_dict(p))
+
+        timings = {}
+
+        def timed(label, fn):
+            t0 = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                timings[label] = time.perf_counter() - t0
+
+        with ThreadPoolExecutor(max_workers=max(1, min(LOADER_THREADS, len(jobs)))) as pool:
+            futures = {label: pool.submit(timed, label, fn) for label, fn in jobs.items()}
+            results = {label: fut.result() for label, fut in futures.items()}
+
+        model, clip, vae, unet_hash = results["unet"], results["clip"], results["vae"], results["unet hash"]
+        loras = [results[f"lora {i + 1} hash"] for i in range(len(lora_specs))]
+
+        # Apply LORAs
+        t0 = time.perf_counter()
+        for i, (_, lora_weight, clip_weight) in enumerate(loras):
+            lora = results.get(f"lora {i + 1}")
+            if lora is not None:
+                model, clip = comfy.sd.load_lora_for_models(model, clip, lora, lora_weight, clip_weight)
+        timings["apply loras"] = time.perf_counter() - t0
+
+        breakdown = ", ".join(f"{label} {secs:.2f}s" for label, secs in timings.items())
+        print(f"[CompositeMangoLoader] Loaded in {time.perf_counter() - started:.2f}s ({breakdown})")
 
-        return (model, clip, vae, lora_stack, unet_name, unet_hash)
+        return (model, clip, vae, loras, unet_name, unet_hash)
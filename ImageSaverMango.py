@@ -2,10 +2,16 @@ import os
 import re
 import json
 from datetime import datetime
+from concurrent.futures import wait
 
 import numpy as np
-from PIL import Image, PngImagePlugin
+import torch
+from PIL import PngImagePlugin
 import folder_paths
+from .MangoCounters import SUFFIX_COUNTER
+from .MangoImageWriter import (
+    ENCODE_POOL, IMAGE_WRITER, JPEG_EXIF_LIMIT, build_exif, remove_placeholders, save_jpeg, save_png, save_webp,
+)
 
 class ImageSaverMango:
 
@@ -22,6 +28,14 @@ class ImageSaverMango:
                 "filename_prefix": ("STRING", {"default": "ComfyUI", "tooltip": "Prefix for the saved file. Supports placeholders like %date:hhmmss%."}),
                 "subdirectory_name": ("STRING", {"default": "", "tooltip": "Custom subdirectory (inside the output folder) to save the image."}),
             },
+            "optional": {
+                "async_save": ("BOOLEAN", {"default": False, "tooltip": "Write images in the background so the next prompt can start right away. No previews are shown, and write errors are reported after the next save."}),
+                "image_format": (["png", "webp", "jpeg"], {"default": "png", "tooltip": "File format. WebP and JPEG store the parameters in EXIF, where Civitai reads them."}),
+                "quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "WebP/JPEG quality."}),
+                "lossless": ("BOOLEAN", {"default": False, "tooltip": "Lossless WebP (quality then sets compression effort)."}),
+                "effort": ("INT", {"default": 4, "min": 0, "max": 6, "tooltip": "WebP encoder effort: higher is smaller but slower."}),
+                "compress_metadata": ("BOOLEAN", {"default": False, "tooltip": "PNG only: store large text chunks (workflow, prompt) compressed as zTXt/iTXt. Smaller files, but some tools only read plain tEXt."}),
+            },
             "hidden": {
                 "prompt": "PROMPT",
                 "extra_pnginfo": "EXTRA_PNGINFO",
@@ -31,17 +45,22 @@ class ImageSaverMango:
     RETURN_TYPES = ()
     DESCRIPTION = (
         "Saves images with embedded metadata. Filenames are numbered as prefix_00001, prefix_00002, etc. "
-        "Also creates a single 'parameters' text chunk containing the typical KSampler info (prompt, seed, etc.)."
+        "Also creates a single 'parameters' text chunk containing the typical KSampler info (prompt, seed, etc.). "
+        "WebP and JPEG keep the same 'parameters' text in EXIF."
     )
 
     pattern_format = re.compile(r"(%[^%]+%)")
+    COMPRESS_MIN_CHARS = 1024
 
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
         self.compress_level = 4
         self.prefix_append = ""
+        self._host_buffer = None
 
-    def save_images(self, images, metadata, filename_prefix="ComfyUI", subdirectory_name="", prompt=None, extra_pnginfo=None):
+    def save_images(self, images, metadata, filename_prefix="ComfyUI", subdirectory_name="", async_save=False,
+                    image_format="png", quality=90, lossless=False, effort=4, compress_metadata=False,
+                    prompt=None, extra_pnginfo=None):
         param_string = self.build_param_string(metadata)
 
         base_name = self.format_filename(filename_prefix, metadata) + self.prefix_append
@@ -53,26 +72,71 @@ class ImageSaverMango:
             full_output_folder = self.output_dir
         os.makedirs(full_output_folder, exist_ok=True)
 
-        base_format = "png"
-        start_suffix = self.next_available_suffix(base_name, full_output_folder, base_format)
+        base_format = {"png": "png", "webp": "webp", "jpeg": "jpg"}[image_format]
+        if image_format != "png":
+            # EXIF is the same for every image in the batch.
+            max_exif = JPEG_EXIF_LIMIT if image_format == "jpeg" else None
+            exif = build_exif(param_string, prompt=prompt, extra_pnginfo=extra_pnginfo, max_bytes=max_exif)
+        else:
+            shared_pnginfo = self.prepare_batch_pnginfo(
+                metadata, param_string, prompt=prompt, extra_pnginfo=extra_pnginfo, compress=compress_metadata
+            )
+        reserved = SUFFIX_COUNTER.reserve(full_output_folder, base_name, base_format, len(images))
 
         results = []
-        for i, image in enumerate(images):
-            arr = self.to_uint8(image)
-            pil_img = Image.fromarray(arr)
-            # Build a PngInfo object.
-            pnginfo = self.prepare_pnginfo(metadata, i, len(images), prompt=prompt, extra_pnginfo=extra_pnginfo)           #added prompt=prompt, extra_pnginfo=extra_pnginfo)
-            pnginfo.add_text("parameters", param_string)
-            suffix_number = start_suffix + i
-            filename_with_suffix = f"{base_name}_{suffix_number:05d}"
-            file = f"{filename_with_suffix}.{base_format}"
-            full_path = os.path.join(full_output_folder, file)
-            pil_img.save(full_path, pnginfo=pnginfo, compress_level=self.compress_level)
-            results.append({
-                "filename": file,
-                "subfolder": full_output_folder,
-                "type": "output",
-            })
+        writes = []
+        submitted = set()
+        try:
+            # Background writes outlive this call, so they can't share the reusable buffer.
+            batch = self.batch_to_uint8(images, copy=async_save)
+
+            for i in range(len(batch)):
+                arr = batch[i]
+                _, full_path = reserved[i]
+                file = os.path.basename(full_path)
+                if image_format == "webp":
+                    job = (save_webp, arr, full_path, exif, quality, lossless, effort)
+                elif image_format == "jpeg":
+                    job = (save_jpeg, arr, full_path, exif, quality)
+                else:
+                    # Build a PngInfo object.
+                    pnginfo = self.prepare_pnginfo(metadata, i, len(images), shared=shared_pnginfo)
+                    job = (save_png, arr, full_path, pnginfo, self.compress_level)
+                if async_save:
+                    IMAGE_WRITER.submit(*job, label=file, placeholder=full_path)
+                    submitted.add(full_path)
+                else:
+                    writes.append(ENCODE_POOL.submit(*job))
+                    # Background files are still empty when this returns, and the
+                    # frontend only fetches a preview once, so they get none.
+                    results.append({
+                        "filename": file,
+                        "subfolder": full_output_folder,
+                        "type": "output",
+                    })
+            # Encoded concurrently. Wait for every one before re-raising the first
+            # failure: the others may still be reading the reusable host buffer.
+            first_error = None
+            for future in writes:
+                try:
+                    future.result()
+                except Exception as e:
+                    first_error = first_error or e
+            if first_error is not None:
+                raise first_error
+        except BaseException:
+            # Don't leave empty reserved files behind; the image loader (and
+            # anything else) would choke on them. Background jobs clean up
+            # their own.
+            wait(writes)
+            remove_placeholders(path for _, path in reserved if path not in submitted)
+            raise
+
+        # Reported only after this batch is saved, so an old failure never
+        # costs the current images.
+        errors = IMAGE_WRITER.pop_errors()
+        if errors:
+            raise RuntimeError("Earlier background image writes failed: " + "; ".join(errors))
 
         return {"ui": {"images": results}}
 
@@ -105,6 +169,27 @@ class ImageSaverMango:
         return param_string
 
 
+    def batch_to_uint8(self, images, copy=False):
+        """
+        Convert a whole IMAGE batch to uint8 on its own device and bring it to
+        the host in one transfer. Returns a [B, H, W, C] uint8 array whose
+        batch[i] are zero-copy views. For CUDA batches the array lives in a
+        pinned buffer that the next call reuses, unless copy=True.
+        """
+        if not isinstance(images, torch.Tensor):
+            return np.stack([self.to_uint8(image) for image in images])
+        batch = (images * 255.0).clamp_(0, 255).to(torch.uint8)
+        if batch.device.type == "cpu":
+            return batch.numpy()
+        if copy or batch.device.type != "cuda":
+            # Pinned memory only speeds up CUDA copies.
+            return batch.cpu().numpy()
+        buf = self._host_buffer
+        if buf is None or buf.shape != batch.shape:
+            buf = self._host_buffer = torch.empty(batch.shape, dtype=torch.uint8, pin_memory=True)
+        buf.copy_(batch)
+        return buf.numpy()
+
     def to_uint8(self, image):
         if hasattr(image, "cpu"):
             arr = image.cpu().numpy() * 255.0
@@ -112,18 +197,39 @@ class ImageSaverMango:
             arr = np.array(image) * 255.0
         return np.clip(arr, 0, 255).astype(np.uint8)
 
-    def prepare_pnginfo(self, meta_dict, index, total, prompt=None, extra_pnginfo=None):            #added prompt=None, extra_pnginfo=None
+    def prepare_batch_pnginfo(self, meta_dict, param_string=None, prompt=None, extra_pnginfo=None, compress=False):
+        """
+        Render the text chunks shared by every image of a batch once. With
+        compress=True, values of COMPRESS_MIN_CHARS or more (typically the
+        prompt and workflow JSON) are stored zlib-compressed as zTXt/iTXt;
+        'parameters' always stays plain tEXt for A1111/Civitai readers.
+        """
+        shared = PngImagePlugin.PngInfo()
+
+        def add(key, value):
+            shared.add_text(key, value, zip=compress and len(value) >= self.COMPRESS_MIN_CHARS)
+
+        for key, value in meta_dict.items():
+            add(str(key), str(value))
+        if prompt is not None:
+            add("prompt", json.dumps(prompt))
+        if extra_pnginfo is not None:
+            for k, v in extra_pnginfo.items():
+                add(str(k), json.dumps(v))
+        if param_string is not None:
+            shared.add_text("parameters", param_string)
+        return shared
+
+    def prepare_pnginfo(self, meta_dict, index, total, prompt=None, extra_pnginfo=None, shared=None):            #added prompt=None, extra_pnginfo=None
         pnginfo = PngImagePlugin.PngInfo()
         if total > 1:
             pnginfo.add_text("Batch index", str(index))
             pnginfo.add_text("Batch size", str(total))
-        for key, value in meta_dict.items():
-            pnginfo.add_text(str(key), str(value))
-        if prompt is not None:                                                                      #added from here...
-            pnginfo.add_text("prompt", json.dumps(prompt))
-        if extra_pnginfo is not None:
-            for k, v in extra_pnginfo.items():
-                pnginfo.add_text(str(k), json.dumps(v))                                             #...to here
+        if shared is None:
+            shared = self.prepare_batch_pnginfo(meta_dict, prompt=prompt, extra_pnginfo=extra_pnginfo)
+        # Already-rendered chunks; only the batch index differs per image.
+        for chunk in shared.chunks:
+            pnginfo.add(*chunk)
         return pnginfo
 
     def format_filename(self, filename, meta_dict):
@@ -146,17 +252,3 @@ class ImageSaverMango:
                     fmt = fmt.replace(k, v)
                 filename = filename.replace(match, fmt)
         return filename
-
-    def next_available_suffix(self, base_name, folder, ext):
-        pattern = re.compile(rf"^{re.escape(base_name)}_(\d+)\.{ext}$")
-        max_num = 0
-        for fname in os.listdir(folder):
-            m = pattern.match(fname)
-            if m:
-                try:
-                    num = int(m.group(1))
-                    if num > max_num:
-                        max_num = num
-                except Exception:
-                    pass
-        return max_num + 1
@@ -1,7 +1,6 @@
 import os
 import json
 import torch
-import hashlib
 from comfy import samplers
 import comfy.sample
 import comfy.utils
@@ -9,19 +8,11 @@ import comfy.model_management
 import latent_preview
 import folder_paths
 from .MangoTriggerExporter import get_lora_metadata
+from .MangoHashing import short_sha256
+from .MangoLoraStack import iter_lora_stack
 
 LAST_USED_SEED = None
 
-def short_sha256(file_path):
-    if not os.path.exists(file_path):
-        return "no_file"
-    h = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            h.update(chunk)
-    return h.hexdigest()[:10]
-
-
 def find_model_file_and_hash(model_name):
     candidate = folder_paths.get_full_path("checkpoints", model_name)
     if candidate and os.path.exists(candidate):
@@ -31,19 +22,9 @@ def find_model_file_and_hash(model_name):
 
 def parse_loras_from_stack(lora_stack):
     results = {}
-    if not lora_stack:
-        return results
-    for item in lora_stack:
-        if isinstance(item, (tuple, list)) and len(item) > 0:
-            lora_name = item[0]
-            if lora_name and lora_name != "None":
-                base = os.path.basename(lora_name)
-                lora_path = folder_paths.get_full_path("loras", lora_name)
-                if lora_path and os.path.exists(lora_path):
-                    lora_hash = short_sha256(lora_path)
-                    results[base] = f"{base}: {lora_hash}"
-                else:
-                    results[base] = base
+    for lora_name, lora_hash in iter_lora_stack(lora_stack):
+        base = os.path.basename(lora_name)
+        results[base] = f"{base}: {lora_hash}" if lora_hash else base
     return results
 
 
@@ -187,15 +168,9 @@ class KSamplerMango(BaseNode):
             metadata["Lora hashes"] = lora_info
 
         hash_dict = {"model": model_short_hash}
-        if lora_list:
-            for item in lora_list:
-                if isinstance(item, (tuple, list)) and len(item) > 0:
-                    ln = item[0]
-                    if ln and ln != "None":
-                        base = os.path.basename(ln)
-                        lora_path = folder_paths.get_full_path("loras", ln)
-                        if lora_path and os.path.exists(lora_path):
-                            hash_dict[f"lora:{base}"] = short_sha256(lora_path)
+        for ln, lora_hash in iter_lora_stack(lora_list):
+            if lora_hash:
+                hash_dict[f"lora:{os.path.basename(ln)}"] = lora_hash
         metadata["Hashes"] = json.dumps(hash_dict)
 
         # Include any extra PNG info
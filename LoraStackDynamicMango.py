@@ -0,0 +1,77 @@
+import os
+import folder_paths
+from .MangoLoraMerge import apply_lora_stack
+from .MangoLoraStack import make_lora_entry
+
+class LoraStackDynamicMango:
+    """
+    LoRA stack of any length, one LoRA per line:
+
+        name[:model_weight[:clip_weight]]
+
+    Names match the LoRA list exactly, or case-insensitively by file name
+    with or without extension. Blank lines and lines starting with '#' are
+    ignored.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "model": ("MODEL",),
+                "clip": ("CLIP",),
+                "loras": ("STRING", {"multiline": True, "default": "", "tooltip": "One LoRA per line: name[:model_weight[:clip_weight]]"}),
+            },
+            "optional": {
+                "lora_stack": ("LORA_STACK", {"tooltip": "Existing LoRA stack to extend"}),
+                "fuse_loras": ("BOOLEAN", {"default": False, "tooltip": "Merge the new LoRAs into one patch (cached on disk) instead of applying them one by one"}),
+            }
+        }
+
+    RETURN_TYPES = ("MODEL", "CLIP", "LORA_STACK")
+    RETURN_NAMES = ("model", "clip", "lora_stack")
+    FUNCTION = "apply_loras"
+    CATEGORY = "Mango Node Pack/Loaders"
+
+    @staticmethod
+    def _name_lookup():
+        lookup = {}
+        for name in folder_paths.get_filename_list("loras"):
+            lookup.setdefault(name, name)
+            base = os.path.basename(name).lower()
+            lookup.setdefault(base, name)
+            lookup.setdefault(os.path.splitext(base)[0], name)
+        return lookup
+
+    @staticmethod
+    def parse_lines(text):
+        """Yield (name, model_weight, clip_weight) for each LoRA line."""
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(":")
+            weights = []
+            # Peel numeric fields off the end so names containing ':' still work.
+            while len(parts) > 1 and len(weights) < 2:
+                try:
+                    weights.insert(0, float(parts[-1]))
+                except ValueError:
+                    break
+                parts.pop()
+            name = ":".join(parts).strip()
+            model_weight = weights[0] if weights else 1.0
+            clip_weight = weights[1] if len(weights) > 1 else model_weight
+            yield name, model_weight, clip_weight
+
+    def apply_loras(self, model, clip, loras, lora_stack=None, fuse_loras=False):
+        lookup = self._name_lookup()
+        new_entries = []
+        for name, model_weight, clip_weight in self.parse_lines(loras):
+            resolved = lookup.get(name) or lookup.get(name.lower())
+            if resolved is None:
+                print(f"[LoraStackDynamicMango] LoRA not found, skipping: {name}")
+                continue
+            new_entries.append(make_lora_entry(resolved, model_weight, clip_weight))
+        model, clip = apply_lora_stack(model, clip, new_entries, fuse=fuse_loras)
+        return (model, clip, (list(lora_stack) if lora_stack else []) + new_entries)
@@ -1,15 +1,6 @@
-import os
 import folder_paths
-import comfy.sd
-import comfy.utils
-
-def load_single_lora(model, clip, lora_name, weight):
-    lora_path = folder_paths.get_full_path("loras", lora_name)
-    if not lora_path or not os.path.exists(lora_path):
-        return model, clip
-    lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
-    model, clip = comfy.sd.load_lora_for_models(model, clip, lora, weight, weight)
-    return model, clip
+from .MangoModelCache import load_single_lora
+from .MangoLoraStack import make_lora_entry
 
 class LoraStackMango:
 
@@ -45,6 +36,7 @@ class LoraStackMango:
             name = kwargs.get(f"LoraName{i}")
             weight = kwargs.get(f"LoraWeight{i}", 1.0)
             if name and name != "None":
-                model, clip = load_single_lora(model, clip, name, weight)
-                new_lora_stack.append((name, weight, weight))
+                entry = make_lora_entry(name, weight, weight)
+                model, clip = load_single_lora(model, clip, name, weight, weight, entry.path)
+                new_lora_stack.append(entry)
         return (model, clip, new_lora_stack)
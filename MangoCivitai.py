@@ -0,0 +1,135 @@
+"""
+Civitai API client shared by the metadata nodes.
+
+One keep-alive requests.Session per client, per-request timeouts, retries with
+exponential backoff on connection errors / 429 / 5xx, and coalescing of
+identical in-flight lookups so two callers asking for the same hash share one
+HTTP request. lookup_many() resolves a batch of hashes concurrently with
+bounded parallelism.
+
+Environment:
+- MANGO_CIVITAI_API: API base URL (point it at a local stand-in for testing)
+- MANGO_CIVITAI_TIMEOUT: read timeout in seconds (default 15)
+- MANGO_CIVITAI_PARALLEL: max concurrent requests (default 4)
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_BASE = os.environ.get("MANGO_CIVITAI_API", "https://civitai.com/api/v1").rstrip("/")
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = float(os.environ.get("MANGO_CIVITAI_TIMEOUT", "15"))
+MAX_PARALLEL = max(1, int(os.environ.get("MANGO_CIVITAI_PARALLEL", "4")))
+RETRIES = 3
+BACKOFF = 0.5
+
+
+class CivitaiClient:
+
+    def __init__(self, base_url=API_BASE, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_parallel=MAX_PARALLEL, retries=RETRIES, backoff=BACKOFF):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_parallel = max_parallel
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.requests_sent = 0
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                retry = Retry(
+                    total=self.retries,
+                    connect=self.retries,
+                    read=self.retries,
+                    status=self.retries,
+                    backoff_factor=self.backoff,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=self.max_parallel,
+                    pool_maxsize=self.max_parallel,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = "MangoNodePack"
+                self._session = session
+            return self._session
+
+    def _fetch_model_version(self, hash_value):
+        with self._lock:
+            self.requests_sent += 1
+        response = self.session.get(
+            f"{self.base_url}/model-versions/by-hash/{hash_value}",
+            timeout=self.timeout,
+        )
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            return {}
+        # Anything else (rate limit, outage) is transient: let the caller retry later.
+        response.raise_for_status()
+        raise requests.HTTPError(f"Unexpected status {response.status_code} from Civitai", response=response)
+
+    def model_version_by_hash(self, hash_value):
+        """
+        Return the model-version JSON for hash_value, or {} when Civitai has
+        no match (404). Network errors and other HTTP errors propagate after
+        retries are exhausted.
+        """
+        key = hash_value.lower()
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._inflight[key] = pending
+        if not owner:
+            return pending.result()
+        try:
+            result = self._fetch_model_version(hash_value)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(result)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return result
+
+    def lookup_many(self, hashes):
+        """
+        Resolve several hashes concurrently. Returns {hash: result}, where a
+        result is the model-version dict ({} for no match) or the exception
+        raised for that hash.
+        """
+        unique = list(dict.fromkeys(hashes))
+        results = {}
+        if not unique:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(unique))) as pool:
+            futures = {h: pool.submit(self.model_version_by_hash, h) for h in unique}
+            for h, fut in futures.items():
+                try:
+                    results[h] = fut.result()
+                except Exception as e:
+                    results[h] = e
+        return results
+
+
+CIVITAI = CivitaiClient()
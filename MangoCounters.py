@@ -0,0 +1,73 @@
+"""
+Filename counters for the savers.
+
+Finding the next free prefix_NNNNN suffix used to mean listing the whole target
+folder on every save. SuffixCounter scans a (folder, prefix, extension) once,
+then hands out numbers from memory. Each number is claimed by creating its file
+with O_CREAT | O_EXCL, so several ComfyUI processes writing into the same folder
+can never pick the same name: a process that loses the race moves on to the
+next number, and rescans the folder after a run of collisions to catch up
+with the other writers.
+"""
+
+import os
+import re
+import threading
+
+RESCAN_AFTER_COLLISIONS = 16
+
+
+class SuffixCounter:
+
+    def __init__(self):
+        self._next = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scan(folder, prefix, ext):
+        """Next suffix after the highest prefix_<n>.<ext> in folder."""
+        pattern = re.compile(rf"^{re.escape(prefix)}_(\d+)\.{re.escape(ext)}$")
+        max_num = 0
+        with os.scandir(folder) as it:
+            for entry in it:
+                m = pattern.match(entry.name)
+                if m:
+                    max_num = max(max_num, int(m.group(1)))
+        return max_num + 1
+
+    def reserve(self, folder, prefix, ext, count=1, width=5):
+        """
+        Claim count new files named prefix_<n>.<ext> (n zero-padded to width)
+        in folder. Returns [(n, full path)] in increasing order; each file
+        already exists, empty, and is the caller's to overwrite, or to
+        remove if writing it fails.
+        """
+        st = os.stat(folder)
+        # Keyed by the folder's identity too, so a deleted and recreated
+        # folder starts counting from its contents again.
+        key = (os.path.realpath(folder), st.st_dev, st.st_ino, prefix, ext)
+        reserved = []
+        with self._lock:
+            num = self._next.get(key)
+            if num is None:
+                num = self.scan(folder, prefix, ext)
+            collisions = 0
+            while len(reserved) < count:
+                path = os.path.join(folder, f"{prefix}_{num:0{width}d}.{ext}")
+                try:
+                    os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                except FileExistsError:
+                    collisions += 1
+                    if collisions >= RESCAN_AFTER_COLLISIONS:
+                        num = max(num + 1, self.scan(folder, prefix, ext))
+                        collisions = 0
+                    else:
+                        num += 1
+                    continue
+                reserved.append((num, path))
+                num += 1
+            self._next[key] = num
+        return reserved
+
+
+SUFFIX_COUNTER = SuffixCounter()
@@ -0,0 +1,361 @@
+"""
+Shared file hashing for the pack.
+
+Model hashes are kept in an on-disk index (hash_index.json next to this file)
+keyed by the resolved path and validated against the file's size, mtime_ns and
+inode, so a checkpoint or LoRA is only re-read after it has actually changed.
+The index file is rewritten at most every SAVE_INTERVAL seconds (10); hashes
+computed in between are written by a timer, at the end of a deferred_saves()
+block, or when the process exits.
+
+Set MANGO_HASH_VERIFY=1 to re-hash every file anyway (for filesystems whose
+mtimes can't be trusted); mismatches against the index are reported.
+
+Set MANGO_HASH_WARMUP=1 to hash checkpoints, diffusion models and LoRAs in the
+background when the pack is imported. MANGO_HASH_WARMUP_WORKERS bounds how many
+files are read at once (default 2). A node asking for a hash that is already
+being computed waits for that job instead of reading the file a second time.
+
+All digests come from hash_file(), which reads each file once through a large
+reusable buffer and feeds every requested algorithm from the same pass.
+MANGO_HASH_EXTRA (e.g. "crc32,blake3") adds Civitai's other digests to the
+index; BLAKE3 needs the optional `blake3` package.
+"""
+
+import os
+import json
+import time
+import atexit
+import queue
+import zlib
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "hash_index.json")
+AUTOV2_LENGTH = 10
+BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def _env_flag(name, default="0"):
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+VERIFY = _env_flag("MANGO_HASH_VERIFY")
+WARMUP = _env_flag("MANGO_HASH_WARMUP")
+WARMUP_WORKERS = max(1, int(os.environ.get("MANGO_HASH_WARMUP_WORKERS", "2")))
+WARMUP_FOLDERS = ("checkpoints", "diffusion_models", "loras")
+EXTRA_ALGORITHMS = tuple(
+    a.strip().lower() for a in os.environ.get("MANGO_HASH_EXTRA", "").split(",") if a.strip()
+)
+
+
+#HASHING ENGINE
+
+class _CRC32:
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self):
+        return f"{self.value & 0xFFFFFFFF:08X}"
+
+
+def _new_hasher(algorithm):
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "crc32":
+        return _CRC32()
+    if algorithm == "blake3":
+        if blake3 is None:
+            raise ImportError("BLAKE3 hashing requires 'pip install blake3'")
+        return blake3.blake3()
+    return hashlib.new(algorithm)
+
+
+def hash_file(path, algorithms=("sha256",), buffer_size=BUFFER_SIZE):
+    """
+    Compute every digest in algorithms from a single read of path.
+    Returns {algorithm: hexdigest}. CRC32 is upper-case hex like Civitai's.
+    """
+    hashers = {a: _new_hasher(a) for a in dict.fromkeys(algorithms)}
+    updates = [h.update for h in hashers.values()]
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            chunk = view[:n]
+            for update in updates:
+                update(chunk)
+    return {a: h.hexdigest() for a, h in hashers.items()}
+
+
+def _fingerprint(st):
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
+
+
+class HashIndex:
+    """
+    Persistent {resolved path: fingerprint + hashes} map.
+    Entries are only trusted while size, mtime_ns and inode still match.
+    """
+
+    SAVE_INTERVAL = 10.0
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self._entries = None
+        self._inflight = {}
+        self._deferred = 0
+        self._dirty = False
+        self._last_save = 0.0
+        self._timer = None
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            self._entries = {}
+        except Exception as e:
+            print(f"[MangoHashing] Ignoring unreadable hash index {self.index_path}: {e}")
+            self._entries = {}
+        return self._entries
+
+    def _save(self):
+        # Merge with whatever other processes wrote since we loaded, then
+        # replace the file atomically so readers never see a partial write.
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                on_disk = json.load(f)
+            if not isinstance(on_disk, dict):
+                on_disk = {}
+        except Exception:
+            on_disk = {}
+        on_disk.update(self._entries)
+        self._entries = on_disk
+        self._dirty = False
+        self._last_save = time.monotonic()
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(on_disk, f, indent=1)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"[MangoHashing] Error saving hash index: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _save_later(self):
+        if self._timer is None:
+            delay = max(0.0, self._last_save + self.SAVE_INTERVAL - time.monotonic())
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write hashes that are still waiting for the next save."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def lookup(self, path):
+        """Return the cached entry for path if it is still current, else None."""
+        key = os.path.realpath(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and all(entry.get(k) == v for k, v in _fingerprint(st).items()):
+            return entry
+        return None
+
+    def hashes(self, path, verify=None, extra=None):
+        """
+        Return {"sha256": ..., "autov2": ..., <extra>: ...} for path, hashing
+        only when the index has no current entry with every requested digest
+        (or always, in verify mode). Returns None if the file does not exist.
+        """
+        if verify is None:
+            verify = VERIFY
+        extra = tuple(EXTRA_ALGORITHMS if extra is None else extra)
+        key = os.path.realpath(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+
+        cached = self.lookup(key)
+        if cached and not verify and all(a in cached for a in extra):
+            return cached
+
+        # Only one thread hashes a given file; everyone else waits for it.
+        with self._lock:
+            if not verify:
+                cached = self.lookup(key)
+                if cached and all(a in cached for a in extra):
+                    return cached
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._inflight[key] = pending
+        if not owner:
+            entry = pending.result()
+            if verify or all(a in entry for a in extra):
+                return entry
+            return self.hashes(key, verify=verify, extra=extra)
+
+        try:
+            entry = self._compute(key, st, cached, extra)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(entry)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return entry
+
+    def _compute(self, key, st, cached, extra=()):
+        digests = hash_file(key, ("sha256",) + tuple(extra))
+        sha256 = digests["sha256"]
+        if cached and cached.get("sha256") != sha256:
+            print(f"[MangoHashing] Hash changed for {key} without a size/mtime change; index updated.")
+        entry = _fingerprint(st)
+        entry.update(digests)
+        entry["autov2"] = sha256[:AUTOV2_LENGTH]
+        with self._lock:
+            self._load()[key] = entry
+            self._dirty = True
+            if time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+                self._save()
+            else:
+                self._save_later()
+        return entry
+
+    @contextmanager
+    def deferred_saves(self):
+        """
+        Write any pending hashes when the outermost block exits, so a bulk
+        job over many files is on disk as soon as it finishes.
+        """
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                if not self._deferred and self._dirty:
+                    self._save()
+
+
+HASH_INDEX = HashIndex()
+atexit.register(HASH_INDEX.flush)
+
+
+def file_sha256(path, verify=None):
+    """Full SHA-256 hex digest of path, or None if it doesn't exist."""
+    entry = HASH_INDEX.hashes(path, verify=verify)
+    return entry["sha256"] if entry else None
+
+
+def short_sha256(path, verify=None):
+    """AutoV2 (first 10 hex chars of SHA-256) of path, or "no_file"."""
+    if not path or not os.path.exists(path):
+        return "no_file"
+    entry = HASH_INDEX.hashes(path, verify=verify)
+    return entry["autov2"] if entry else "no_file"
+
+
+#BACKGROUND WARM-UP
+
+def _warmup_paths(folders):
+    import folder_paths
+    seen = set()
+    for folder in folders:
+        try:
+            names = folder_paths.get_filename_list(folder)
+        except Exception as e:
+            print(f"[MangoHashing] Warm-up skipping '{folder}': {e}")
+            continue
+        for name in names:
+            path = folder_paths.get_full_path(folder, name)
+            if path and path not in seen:
+                seen.add(path)
+                yield path
+
+
+def _warmup_worker(jobs, stats):
+    with HASH_INDEX.deferred_saves():
+        while True:
+            try:
+                path = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if HASH_INDEX.lookup(path) is None:
+                    entry = HASH_INDEX.hashes(path)
+                    if entry:
+                        with stats["lock"]:
+                            stats["files"] += 1
+                            stats["bytes"] += entry["size"]
+            except Exception as e:
+                print(f"[MangoHashing] Warm-up failed for {path}: {e}")
+
+
+def start_warmup(folders=WARMUP_FOLDERS, workers=None, force=False):
+    """
+    Hash every model in the given folder_paths categories on background
+    daemon threads. Does nothing unless MANGO_HASH_WARMUP is set or force=True.
+    Returns the started threads.
+    """
+    if not (WARMUP or force):
+        return []
+    workers = workers or WARMUP_WORKERS
+    jobs = queue.Queue()
+    for path in _warmup_paths(folders):
+        jobs.put(path)
+    stats = {"files": 0, "bytes": 0, "lock": threading.Lock()}
+    started = time.perf_counter()
+
+    def report(threads):
+        for t in threads:
+            t.join()
+        if stats["files"]:
+            elapsed = time.perf_counter() - started
+            print(f"[MangoHashing] Warm-up hashed {stats['files']} files "
+                  f"({stats['bytes'] / 2**30:.1f} GiB) in {elapsed:.1f}s")
+
+    threads = [
+        threading.Thread(target=_warmup_worker, args=(jobs, stats), name=f"mango-hash-warmup-{i}", daemon=True)
+        for i in range(min(workers, max(1, jobs.qsize())))
+    ]
+    for t in threads:
+        t.start()
+    threading.Thread(target=report, args=(threads,), name="mango-hash-warmup-report", daemon=True).start()
+    return threads
@@ -6,6 +6,7 @@ from PIL import Image, ImageOps, ImageSequence
 
 import folder_paths
 import node_helpers
+from .MangoListing import directory_index
 
 class MangoImageLoader:
     @classmethod
@@ -13,12 +14,8 @@ class MangoImageLoader:
         output_dir = folder_paths.get_output_directory()
         subfolders = []
         if output_dir and os.path.exists(output_dir):
-            # Find all subfolders under the output directory
-            for root, dirs, files in os.walk(output_dir):
-                for d in dirs:
-                    rel_path = os.path.relpath(os.path.join(root, d), output_dir)
-                    subfolders.append(rel_path)
-        subfolders = sorted(subfolders)
+            # All subfolders under the output directory, from the shared listing index
+            subfolders = list(directory_index(output_dir).subdirectories())
         if not subfolders:
             subfolders = [""]
         return {
@@ -43,11 +40,13 @@ class MangoImageLoader:
             print(f"Error: Subfolder '{subfolder}' not found in output directory.")
             return (torch.zeros((1, 1, 1, 1)), torch.zeros((1, 1, 1)))
 
-        # Gather all common image files
+        # Gather all common image files. Empty ones are names Image Saver
+        # (Mango) has reserved but not written yet (e.g. with async_save).
         files = sorted(
             f for f in os.listdir(folder)
-            if os.path.isfile(os.path.join(folder, f))
-            and f.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp"))
+            if f.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp"))
+            and os.path.isfile(os.path.join(folder, f))
+            and os.path.getsize(os.path.join(folder, f)) > 0
         )
 
         output_images = []
@@ -0,0 +1,187 @@
+"""
+Background image writing for ImageSaverMango.
+
+With async saving, the saver hands each image (already converted to a CPU
+uint8 array) and its PNG info to IMAGE_WRITER and returns right away, so the
+next prompt can start sampling while the previous batch is still being
+compressed and written. The writer runs MANGO_WRITER_THREADS threads (default
+2). At most MANGO_WRITER_QUEUE images (default 16) may be waiting or in
+progress; beyond that, submit() blocks until a slot frees up, so a slow disk
+can't grow memory without bound.
+
+Failed writes are logged as they happen and also kept, so the next save can
+report them. Pending writes are flushed when the process exits.
+
+Every save_* function encodes to a hidden temporary file next to the target
+and renames it into place, so readers never see a half-written image.
+
+Without async saving, a batch's images are still encoded concurrently on
+ENCODE_POOL (MANGO_ENCODE_THREADS threads, default up to 8): Pillow releases
+the GIL while zlib compresses, so the images of a batch use separate cores.
+
+WebP and JPEG files carry the A1111 "parameters" string in the EXIF
+UserComment (UNICODE character code + UTF-16BE, as A1111 writes and Civitai
+reads it), and the ComfyUI prompt/workflow in the Model/Make tags the way
+ComfyUI's own WebP saver stores them.
+"""
+
+import os
+import json
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+WRITER_THREADS = max(1, int(os.environ.get("MANGO_WRITER_THREADS", "2")))
+WRITER_QUEUE = max(1, int(os.environ.get("MANGO_WRITER_QUEUE", "16")))
+EXIF_IFD = 0x8769
+EXIF_USER_COMMENT = 0x9286
+EXIF_MODEL = 0x0110
+EXIF_MAKE = 0x010F
+# JPEG keeps EXIF in one APP1 segment, whose length field is 16 bits.
+JPEG_EXIF_LIMIT = 65533
+ENCODE_THREADS = max(1, int(os.environ.get("MANGO_ENCODE_THREADS", str(min(8, os.cpu_count() or 1)))))
+
+
+def _save_replace(img, path, **params):
+    folder, name = os.path.split(path)
+    tmp_path = os.path.join(folder, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        img.save(tmp_path, **params)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_png(arr, path, pnginfo, compress_level):
+    _save_replace(Image.fromarray(arr), path, format="PNG", pnginfo=pnginfo, compress_level=compress_level)
+
+
+def save_webp(arr, path, exif, quality, lossless, effort):
+    _save_replace(Image.fromarray(arr), path, format="WEBP", exif=exif, quality=quality, lossless=lossless, method=effort)
+
+
+def save_jpeg(arr, path, exif, quality):
+    img = Image.fromarray(arr)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    _save_replace(img, path, format="JPEG", exif=exif, quality=quality)
+
+
+def remove_placeholders(paths):
+    """Delete reserved output files that are still empty, i.e. were never written."""
+    for path in paths:
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def build_exif(parameters, prompt=None, extra_pnginfo=None, max_bytes=None):
+    """
+    Serialized EXIF with parameters in UserComment and, if they fit within
+    max_bytes, the prompt and extra_pnginfo (workflow) as JSON.
+    """
+    exif = Image.Exif()
+    exif.get_ifd(EXIF_IFD)[EXIF_USER_COMMENT] = b"UNICODE\0" + parameters.encode("utf-16-be")
+    data = exif.tobytes()
+    if prompt is None and not extra_pnginfo:
+        return data
+    if prompt is not None:
+        exif[EXIF_MODEL] = "prompt:" + json.dumps(prompt)
+    tag = EXIF_MAKE
+    for k, v in (extra_pnginfo or {}).items():
+        exif[tag] = f"{k}:{json.dumps(v)}"
+        tag -= 1
+    full = exif.tobytes()
+    if max_bytes is not None and len(full) > max_bytes:
+        print(f"[MangoImageWriter] Workflow metadata ({len(full)} bytes) doesn't fit in EXIF; "
+              "saving only the parameters")
+        return data
+    return full
+
+
+class ImageWriter:
+
+    def __init__(self, workers=WRITER_THREADS, max_pending=WRITER_QUEUE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pending = set()
+        self._errors = []
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mango-image-writer")
+            return self._pool
+
+    def submit(self, fn, *args, label=None, placeholder=None):
+        """
+        Run fn(*args) in the background. Blocks while max_pending jobs are
+        outstanding. placeholder is the reserved, still empty file fn writes;
+        it is removed if fn fails.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor().submit(self._run, fn, args, label, placeholder)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, fn, args, label, placeholder):
+        try:
+            return fn(*args)
+        except Exception as e:
+            if placeholder:
+                remove_placeholders([placeholder])
+            message = f"{label or getattr(fn, '__name__', 'write')}: {e}"
+            print(f"[MangoImageWriter] Write failed: {message}")
+            with self._lock:
+                self._errors.append(message)
+            raise
+        finally:
+            self._slots.release()
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def pop_errors(self):
+        """Return and clear the failures recorded since the last call."""
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def flush(self, timeout=None):
+        """Wait until every submitted job has finished."""
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            print(f"[MangoImageWriter] Waiting for {len(pending)} images to be written")
+        for future in pending:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+
+IMAGE_WRITER = ImageWriter()
+ENCODE_POOL = ThreadPoolExecutor(max_workers=ENCODE_THREADS, thread_name_prefix="mango-image-encode")
+atexit.register(IMAGE_WRITER.flush)
@@ -0,0 +1,132 @@
+"""
+Change-aware directory listings for INPUT_TYPES dropdowns.
+
+The UI calls INPUT_TYPES every time it refreshes node definitions, and walking
+an output folder with hundreds of thousands of images on each call makes
+/object_info slow. DirectoryIndex keeps every directory's subdirectories
+together with the directory's mtime_ns; a refresh only stats each directory
+and re-lists the ones whose mtime changed (adding, removing or renaming an
+entry updates the mtime of the directory that holds it). File names are not
+kept, so memory grows with the number of folders, not images. Lists derived
+from the tree, such as "all subfolders", are memoised until something
+changes.
+
+A directory whose mtime is within RACY_WINDOW_NS of the moment it was listed
+is re-listed on the next refresh, since a change in the same timestamp tick
+would otherwise go unnoticed on filesystems with coarse mtimes.
+"""
+
+import os
+import time
+import threading
+
+RACY_WINDOW_NS = 2 * 10**9
+MIN_REFRESH_INTERVAL = 1.0
+
+
+class _DirEntry:
+    __slots__ = ("mtime_ns", "subdirs", "links")
+
+    def __init__(self, mtime_ns, subdirs, links):
+        self.mtime_ns = mtime_ns
+        self.subdirs = subdirs
+        self.links = links
+
+
+class DirectoryIndex:
+    """
+    Recursive listing of root, refreshed by directory mtimes. Like os.walk,
+    symlinked directories are listed but not descended into.
+    """
+
+    def __init__(self, root, min_interval=MIN_REFRESH_INTERVAL):
+        self.root = root
+        self.min_interval = min_interval
+        self.version = 0
+        self.dirs_listed = 0
+        self._dirs = {}
+        self._derived = {}
+        self._checked = None
+        self._lock = threading.RLock()
+
+    def refresh(self, force=False):
+        """Re-list directories that changed; returns True if anything did."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked is not None and now - self._checked < self.min_interval:
+                return False
+            changed = False
+            seen = set()
+            pending = [""]
+            while pending:
+                rel = pending.pop()
+                full = os.path.join(self.root, rel) if rel else self.root
+                try:
+                    mtime_ns = os.stat(full).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(rel)
+                entry = self._dirs.get(rel)
+                if entry is None or entry.mtime_ns is None or entry.mtime_ns != mtime_ns:
+                    try:
+                        entry = self._list(full, mtime_ns)
+                    except OSError:
+                        seen.discard(rel)
+                        continue
+                    self._dirs[rel] = entry
+                    changed = True
+                pending.extend(os.path.join(rel, name) for name in entry.subdirs if name not in entry.links)
+            for rel in self._dirs.keys() - seen:
+                del self._dirs[rel]
+                changed = True
+            if changed:
+                self.version += 1
+                self._derived.clear()
+            self._checked = time.monotonic()
+            return changed
+
+    def _list(self, full, mtime_ns):
+        subdirs, links = [], set()
+        with os.scandir(full) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    subdirs.append(entry.name)
+                    if entry.is_symlink():
+                        links.add(entry.name)
+        self.dirs_listed += 1
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = None
+        return _DirEntry(mtime_ns, subdirs, links)
+
+    def derived(self, key, build):
+        """Return build(dirs) memoised until the tree changes. dirs maps relative dir -> _DirEntry."""
+        with self._lock:
+            self.refresh()
+            if key not in self._derived:
+                self._derived[key] = build(self._dirs)
+            return self._derived[key]
+
+    def subdirectories(self):
+        """Sorted relative paths of every directory below root."""
+        return self.derived(
+            ("subdirectories",),
+            lambda dirs: sorted(os.path.join(rel, name) for rel, entry in dirs.items() for name in entry.subdirs),
+        )
+
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def directory_index(root):
+    """Shared DirectoryIndex for root, so every node listing it reuses one index."""
+    root = os.path.abspath(root)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(root)
+        if index is None:
+            index = _INDEXES[root] = DirectoryIndex(root)
+        return index
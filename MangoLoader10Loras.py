@@ -1,37 +1,7 @@
-import os
-import hashlib
 import folder_paths
-import comfy.sd
-
-def short_hash(path):
-    if not os.path.exists(path):
-        return "no_file"
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            h.update(chunk)
-    return h.hexdigest()[:10]
-
-def load_ckpt(ckpt_name):
-    ckpt_path = folder_paths.get_full_path("checkpoints", ckpt_name)
-    if not ckpt_path or not os.path.exists(ckpt_path):
-        raise ValueError(f"Checkpoint not found: {ckpt_name}")
-    loaded = comfy.sd.load_checkpoint_guess_config(
-        ckpt_path,
-        output_vae=True,
-        output_clip=True,
-        embedding_directory=folder_paths.get_folder_paths("embeddings"),
-    )
-    model, clip, vae = loaded[:3]
-    return model, clip, vae, short_hash(ckpt_path)
-
-def load_single_lora(model, clip, lora_name, weight):
-    lora_path = folder_paths.get_full_path("loras", lora_name)
-    if not lora_path or not os.path.exists(lora_path):
-        return model, clip
-    lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
-    model, clip = comfy.sd.load_lora_for_models(model, clip, lora, weight, weight)
-    return model, clip
+from .MangoModelCache import load_ckpt
+from .MangoLoraMerge import apply_lora_stack
+from .MangoLoraStack import make_lora_entry
 
 class MangoLoader10Loras:
 
@@ -62,6 +32,9 @@ class MangoLoader10Loras:
                 "LoraWeight9": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05, "tooltip": "LoRA 9 weight"}),
                 "LoraName10": (loras, {"default": "None", "tooltip": "LoRA 10 filename"}),
                 "LoraWeight10": ("FLOAT", {"default": 1.0, "min": -10.0, "max": 10.0, "step": 0.05, "tooltip": "LoRA 10 weight"}),
+            },
+            "optional": {
+                "fuse_loras": ("BOOLEAN", {"default": False, "tooltip": "Merge the whole LoRA stack into one patch (cached on disk) instead of applying LoRAs one by one"}),
             }
         }
 
@@ -70,13 +43,13 @@ class MangoLoader10Loras:
     FUNCTION = "load_checkpoint_and_loras"
     CATEGORY = "Mango Node Pack/Loaders"
 
-    def load_checkpoint_and_loras(self, ckpt_name, **kwargs):
+    def load_checkpoint_and_loras(self, ckpt_name, fuse_loras=False, **kwargs):
         model, clip, vae, ckpt_hash = load_ckpt(ckpt_name)
         lora_stack = []
         for i in range(1, 11):
             name = kwargs.get(f"LoraName{i}")
             weight = kwargs.get(f"LoraWeight{i}", 1.0)
             if name and name != "None":
-                model, clip = load_single_lora(model, clip, name, weight)
-                lora_stack.append((name, weight, weight))
+                lora_stack.append(make_lora_entry(name, weight, weight))
+        model, clip = apply_lora_stack(model, clip, lora_stack, fuse=fuse_loras)
         return (model, clip, vae, lora_stack, ckpt_name, ckpt_hash)
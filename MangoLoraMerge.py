@@ -0,0 +1,214 @@
+"""
+Fused application of a whole LoRA stack.
+
+Plain LoRAs (up/down pairs with an optional alpha) are merged into one patch
+per target weight by concatenating their ranks: with each up matrix scaled by
+weight * alpha / rank, [up_1 ... up_n] @ [down_1; ...; down_n] is exactly the
+sum of the individual deltas. The model and clip are then cloned and patched
+once instead of once per LoRA.
+
+Merged stacks are cached on disk in lora_merge_cache/ as safetensors, keyed by
+the SHA-256 of every LoRA file plus its weight, so a recurring stack loads as
+a single pre-merged file. LoRAs that can't be merged this way (LoCon mid
+weights, LoHa, LoKr, DoRA, full diffs) are applied separately as usual.
+MANGO_LORA_MERGE_CACHE_MAX bounds how many merged stacks are kept (default 8).
+"""
+
+import os
+import json
+import time
+import hashlib
+
+import torch
+import folder_paths
+import comfy.lora
+import comfy.sd
+
+from .MangoHashing import file_sha256
+from .MangoModelCache import load_lora_state_dict, load_single_lora
+from .MangoSafetensors import read_safetensors_metadata
+
+MERGE_CACHE_DIR = os.path.join(os.path.dirname(__file__), "lora_merge_cache")
+MERGE_CACHE_MAX = max(0, int(os.environ.get("MANGO_LORA_MERGE_CACHE_MAX", "8")))
+MERGE_FORMAT_VERSION = 1
+
+# (up suffix, down suffix) pairs understood by ComfyUI for plain LoRAs.
+_PAIR_SUFFIXES = (
+    (".lora_up.weight", ".lora_down.weight"),
+    (".lora_B.weight", ".lora_A.weight"),
+    (".lora.up.weight", ".lora.down.weight"),
+    ("_lora.up.weight", "_lora.down.weight"),
+    (".lora_linear_layer.up.weight", ".lora_linear_layer.down.weight"),
+)
+
+
+def split_lora_pairs(sd):
+    """
+    Return {base key: (up, down, alpha or None)} if every tensor in sd belongs
+    to a plain up/down pair, else None (the LoRA can't be rank-merged).
+    """
+    pairs = {}
+    used = set()
+    for key in sd:
+        for up_suffix, down_suffix in _PAIR_SUFFIXES:
+            if not key.endswith(up_suffix):
+                continue
+            base = key[:-len(up_suffix)]
+            down_key = base + down_suffix
+            if down_key not in sd:
+                return None
+            alpha_key = base + ".alpha"
+            alpha = float(sd[alpha_key].item()) if alpha_key in sd else None
+            pairs[base] = (sd[key], sd[down_key], alpha)
+            used.update((key, down_key, alpha_key))
+            break
+    if any(key not in used for key in sd):
+        return None
+    return pairs
+
+
+def _target_key_map(model, clip):
+    key_map = {}
+    if model is not None:
+        key_map = comfy.lora.model_lora_keys_unet(model.model, key_map)
+    if clip is not None:
+        key_map = comfy.lora.model_lora_keys_clip(clip.cond_stage_model, key_map)
+    return key_map
+
+
+def merge_lora_pairs(weighted_pairs, key_map):
+    """
+    weighted_pairs: [(pairs from split_lora_pairs, weight)]. Returns a LoRA
+    state dict with one up/down/alpha triple per target weight, to be applied
+    at strength 1.0.
+    """
+    groups = {}
+    for pairs, weight in weighted_pairs:
+        for base, (up, down, alpha) in pairs.items():
+            # Different files may name the same module differently; group by
+            # what it patches so each target gets exactly one patch.
+            target = key_map.get(base, base)
+            name, parts = groups.setdefault(target, (base, []))
+            rank = down.shape[0]
+            scale = weight * (alpha / rank if alpha is not None else 1.0)
+            parts.append((up, down, scale))
+
+    merged = {}
+    for name, parts in groups.values():
+        dtype = parts[0][0].dtype
+        ups = [(up.float() * scale).to(dtype) for up, _, scale in parts]
+        downs = [down.to(dtype) for _, down, _ in parts]
+        if len({tuple(u.shape[:1]) + tuple(u.shape[2:]) for u in ups}) > 1 or len({tuple(d.shape[1:]) for d in downs}) > 1:
+            # Mixed conv/linear layouts for one target: fall back to 2D, which
+            # ComfyUI reshapes to the weight's shape anyway.
+            ups = [u.flatten(1) for u in ups]
+            downs = [d.flatten(1) for d in downs]
+        up = torch.cat(ups, dim=1).contiguous()
+        down = torch.cat(downs, dim=0).contiguous()
+        merged[f"{name}.lora_up.weight"] = up
+        merged[f"{name}.lora_down.weight"] = down
+        # alpha == total rank makes ComfyUI's alpha / rank scale exactly 1.
+        merged[f"{name}.alpha"] = torch.tensor(float(down.shape[0]))
+    return merged
+
+
+def _stack_cache_path(resolved):
+    key = json.dumps(
+        [MERGE_FORMAT_VERSION] + [[file_sha256(path), float(weight)] for _, weight, path in resolved]
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(MERGE_CACHE_DIR, f"{digest}.safetensors")
+
+
+def _trim_cache():
+    try:
+        files = [os.path.join(MERGE_CACHE_DIR, f) for f in os.listdir(MERGE_CACHE_DIR) if f.endswith(".safetensors")]
+    except OSError:
+        return
+    # Recency is tracked in atime (see apply_lora_stack); mtime stays fixed
+    # so the in-memory LoRA cache key for the file doesn't change.
+    files.sort(key=lambda p: os.stat(p).st_atime, reverse=True)
+    for path in files[MERGE_CACHE_MAX:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _build_merged(resolved, key_map, cache_path):
+    from safetensors.torch import save_file
+
+    weighted_pairs, unfused = [], []
+    for index, (_, weight, path) in enumerate(resolved):
+        pairs = split_lora_pairs(load_lora_state_dict(path))
+        if pairs is None:
+            unfused.append(index)
+        else:
+            weighted_pairs.append((pairs, weight))
+    merged = merge_lora_pairs(weighted_pairs, key_map) if weighted_pairs else {}
+
+    if MERGE_CACHE_MAX:
+        os.makedirs(MERGE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            save_file(
+                merged,
+                tmp_path,
+                metadata={"mango_unfused": json.dumps(unfused), "mango_stack": json.dumps([n for n, _, _ in resolved])},
+            )
+            os.replace(tmp_path, cache_path)
+            _trim_cache()
+        except Exception as e:
+            print(f"[MangoLoraMerge] Could not cache merged LoRA stack: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    return merged, unfused
+
+
+def apply_lora_stack(model, clip, loras, fuse=False):
+    """
+    Apply a LORA_STACK [(lora_name, model_weight, clip_weight)] to model and
+    clip. With fuse=True, plain LoRAs are merged into a single patch set
+    (cached on disk); otherwise each LoRA is applied on its own exactly as
+    before. LoRAs with differing model and clip weights are never fused.
+    """
+    if not fuse:
+        for item in loras:
+            model, clip = load_single_lora(model, clip, item[0], item[1], item[2], getattr(item, "path", None))
+        return model, clip
+
+    resolved, separate = [], []
+    for item in loras:
+        name, weight, clip_weight = item[0], item[1], item[2]
+        path = getattr(item, "path", None) or folder_paths.get_full_path("loras", name)
+        if not path or not os.path.exists(path):
+            continue
+        if weight != clip_weight:
+            separate.append((name, weight, clip_weight, path))
+        elif weight != 0:
+            resolved.append((name, weight, path))
+    if len(resolved) < 2:
+        separate = [(name, weight, weight, path) for name, weight, path in resolved] + separate
+        resolved = []
+    for name, weight, clip_weight, path in separate:
+        model, clip = load_single_lora(model, clip, name, weight, clip_weight, path)
+    if not resolved:
+        return model, clip
+
+    cache_path = _stack_cache_path(resolved)
+    if os.path.exists(cache_path):
+        merged = load_lora_state_dict(cache_path)
+        unfused = json.loads(read_safetensors_metadata(cache_path).get("mango_unfused", "[]"))
+        st = os.stat(cache_path)
+        os.utime(cache_path, ns=(time.time_ns(), st.st_mtime_ns))
+    else:
+        merged, unfused = _build_merged(resolved, _target_key_map(model, clip), cache_path)
+
+    if merged:
+        model, clip = comfy.sd.load_lora_for_models(model, clip, merged, 1.0, 1.0)
+    for index in unfused:
+        name, weight, path = resolved[index]
+        model, clip = load_single_lora(model, clip, name, weight, weight, path)
+    return model, clip
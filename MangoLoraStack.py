@@ -0,0 +1,74 @@
+"""
+LORA_STACK entries.
+
+A LORA_STACK is a list of (lora_name, model_weight, clip_weight) tuples.
+The Mango loaders emit LoraStackEntry items instead: still 3-tuples, so any
+node that indexes or unpacks them keeps working, but they also carry the
+resolved path, size, mtime and SHA-256 computed once at load time, so the
+samplers can build metadata without resolving or hashing files again.
+Plain tuples from other node packs are still accepted everywhere.
+"""
+
+import os
+
+import folder_paths
+from .MangoHashing import AUTOV2_LENGTH, HASH_INDEX
+
+
+class LoraStackEntry(tuple):
+
+    def __new__(cls, name, model_weight, clip_weight, path=None, size=None, mtime_ns=None, sha256=None):
+        self = super().__new__(cls, (name, model_weight, clip_weight))
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        return self
+
+    def __getnewargs__(self):
+        return (self[0], self[1], self[2], self.path, self.size, self.mtime_ns, self.sha256)
+
+    @property
+    def name(self):
+        return self[0]
+
+    @property
+    def autov2(self):
+        return self.sha256[:AUTOV2_LENGTH] if self.sha256 else None
+
+    def __repr__(self):
+        return f"LoraStackEntry({self[0]!r}, {self[1]!r}, {self[2]!r}, sha256={self.autov2!r})"
+
+
+def make_lora_entry(lora_name, model_weight, clip_weight=None):
+    """Resolve and hash a LoRA once, returning a LoraStackEntry."""
+    if clip_weight is None:
+        clip_weight = model_weight
+    path = folder_paths.get_full_path("loras", lora_name)
+    if not path or not os.path.exists(path):
+        return LoraStackEntry(lora_name, model_weight, clip_weight)
+    info = HASH_INDEX.hashes(path) or {}
+    return LoraStackEntry(
+        lora_name, model_weight, clip_weight,
+        path=path, size=info.get("size"), mtime_ns=info.get("mtime_ns"), sha256=info.get("sha256"),
+    )
+
+
+def iter_lora_stack(lora_stack):
+    """
+    Yield (lora_name, autov2 or None) for every named LoRA in a stack. Uses
+    the hash carried by LoraStackEntry items and only falls back to resolving
+    and hashing the file for plain tuples.
+    """
+    for item in lora_stack or []:
+        if not isinstance(item, (tuple, list)) or len(item) == 0:
+            continue
+        lora_name = item[0]
+        if not lora_name or lora_name == "None":
+            continue
+        if isinstance(item, LoraStackEntry) and item.sha256:
+            yield lora_name, item.autov2
+            continue
+        path = folder_paths.get_full_path("loras", lora_name)
+        info = HASH_INDEX.hashes(path) if path else None
+        yield lora_name, (info["autov2"] if info else None)
@@ -0,0 +1,158 @@
+"""
+Persistent LoRA metadata store used by the Trigger Exporter.
+
+Entries are plain dicts keyed by LoRA name, e.g.
+{"triggerWords": "...", "sha256": "...", "path": "...", "size": ..., "mtime_ns": ...};
+the fingerprint fields let callers tell when a file was replaced.
+
+Entries are kept in an in-process dictionary and persisted to SQLite in WAL mode,
+so lookups never touch disk after the first read and several ComfyUI
+processes can write to the same store without corrupting it.
+
+An existing lora_metadata_db.json is imported on first use and renamed to
+lora_metadata_db.json.migrated.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+STORE_DIR = os.path.dirname(__file__)
+DB_PATH = os.path.join(STORE_DIR, "lora_metadata.sqlite")
+LEGACY_JSON_PATH = os.path.join(STORE_DIR, "lora_metadata_db.json")
+
+
+class LoraMetadataStore:
+
+    def __init__(self, db_path=DB_PATH, legacy_json_path=LEGACY_JSON_PATH):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._entries = None
+        self._batch_depth = 0
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS lora_metadata ("
+            " name TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn = conn
+        self._migrate_legacy_json()
+        return conn
+
+    def _migrate_legacy_json(self):
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+        try:
+            with open(self.legacy_json_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"[MangoMetadataStore] Could not read {self.legacy_json_path} for migration: {e}")
+            return
+        if not isinstance(legacy, dict):
+            return
+        now = time.time()
+        rows = [(name, json.dumps(entry), now) for name, entry in legacy.items() if isinstance(entry, dict)]
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Rows already in SQLite (e.g. written by another process) win.
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lora_metadata (name, data, updated) VALUES (?, ?, ?)", rows
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        try:
+            os.replace(self.legacy_json_path, self.legacy_json_path + ".migrated")
+        except OSError:
+            pass
+        print(f"[MangoMetadataStore] Migrated {len(rows)} entries from {os.path.basename(self.legacy_json_path)}")
+
+    def _load(self):
+        if self._entries is None:
+            rows = self._connect().execute("SELECT name, data FROM lora_metadata").fetchall()
+            self._entries = {name: json.loads(data) for name, data in rows}
+        return self._entries
+
+    def get(self, name):
+        """Return the stored entry for name, or None."""
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(name)
+            if entry is None:
+                # Another process may have added it since we loaded.
+                row = self._conn.execute("SELECT data FROM lora_metadata WHERE name = ?", (name,)).fetchone()
+                if row:
+                    entry = entries[name] = json.loads(row[0])
+            return entry
+
+    def set(self, name, entry):
+        with self._lock:
+            self._load()[name] = entry
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lora_metadata (name, data, updated) VALUES (?, ?, ?)",
+                (name, json.dumps(entry), time.time()),
+            )
+
+    def delete(self, name):
+        with self._lock:
+            self._load().pop(name, None)
+            self._conn.execute("DELETE FROM lora_metadata WHERE name = ?", (name,))
+
+    def items(self):
+        with self._lock:
+            return list(self._load().items())
+
+    def prune(self, resolve_path, dry_run=False):
+        """
+        Delete entries whose file is gone. resolve_path(name, entry) returns
+        the file path for an entry (or None). Returns the pruned names.
+        """
+        stale = []
+        for name, entry in self.items():
+            path = resolve_path(name, entry)
+            if not path or not os.path.exists(path):
+                stale.append(name)
+        if stale and not dry_run:
+            with self.batch():
+                for name in stale:
+                    self.delete(name)
+        return stale
+
+    @contextmanager
+    def batch(self):
+        """Group many set()/delete() calls into one transaction."""
+        with self._lock:
+            conn = self._connect()
+            outermost = self._batch_depth == 0
+            if outermost:
+                conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if outermost:
+                    conn.execute("ROLLBACK")
+                    self._entries = None
+                raise
+            else:
+                self._batch_depth -= 1
+                if outermost:
+                    conn.execute("COMMIT")
+
+
+LORA_METADATA = LoraMetadataStore()
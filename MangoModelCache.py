@@ -0,0 +1,164 @@
+"""
+In-memory caches for model files the loaders read repeatedly.
+
+LoRA state dicts are kept in an LRU keyed by (resolved path, size, mtime_ns)
+and bounded by a RAM budget (MANGO_LORA_CACHE_MB, default 2048; 0 disables
+it), so re-running a loader after only a weight change reuses the tensors
+already in memory instead of re-reading and deserialising the file.
+
+Loaded checkpoints are kept unpatched, keyed the same way, in a small LRU
+(MANGO_CKPT_CACHE_SIZE checkpoints, default 1; 0 disables it). load_ckpt()
+hands out clones, so changing a LoRA name or weight only re-applies the LoRA
+patches instead of reloading the checkpoint.
+
+Standalone VAEs (including assembled TAESD pairs) are cached the same way in
+VAES (MANGO_VAE_CACHE_SIZE VAEs, default 2; 0 disables it).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import folder_paths
+import comfy.sd
+import comfy.utils
+
+from .MangoHashing import short_sha256
+from .MangoPrefetch import PREFETCHER
+
+LORA_CACHE_BYTES = int(float(os.environ.get("MANGO_LORA_CACHE_MB", "2048")) * 1024 * 1024)
+CKPT_CACHE_SIZE = max(0, int(os.environ.get("MANGO_CKPT_CACHE_SIZE", "1")))
+VAE_CACHE_SIZE = max(0, int(os.environ.get("MANGO_VAE_CACHE_SIZE", "2")))
+
+
+class ByteBudgetLRU:
+    """Thread-safe LRU that evicts least recently used entries past max_bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if nbytes > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def has_path(self, path):
+        with self._lock:
+            return any(k[0] == path for k in self._entries)
+
+    def discard_path(self, path):
+        """Drop every entry whose key starts with this resolved path."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                self.total_bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def file_cache_key(path):
+    resolved = os.path.realpath(path)
+    st = os.stat(resolved)
+    return (resolved, st.st_size, st.st_mtime_ns)
+
+
+def state_dict_nbytes(sd):
+    return sum(t.numel() * t.element_size() for t in sd.values() if hasattr(t, "element_size"))
+
+
+LORA_STATE_DICTS = ByteBudgetLRU(LORA_CACHE_BYTES)
+# Checkpoints are counted, not measured: each entry costs 1.
+BASE_CHECKPOINTS = ByteBudgetLRU(CKPT_CACHE_SIZE)
+VAES = ByteBudgetLRU(VAE_CACHE_SIZE)
+
+
+def load_lora_state_dict(lora_path):
+    """comfy.utils.load_torch_file for a LoRA, served from LORA_STATE_DICTS when unchanged."""
+    key = file_cache_key(lora_path)
+    lora = LORA_STATE_DICTS.get(key)
+    if lora is not None:
+        return lora
+    PREFETCHER.note_load(lora_path)
+    lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
+    # A changed file leaves its old version behind; drop it right away.
+    LORA_STATE_DICTS.discard_path(key[0])
+    LORA_STATE_DICTS.put(key, lora, state_dict_nbytes(lora))
+    return lora
+
+
+def load_ckpt(ckpt_name):
+    """
+    Return (model, clip, vae, short hash) for a checkpoint. The unpatched
+    base is cached; callers get clones of model and clip so LoRA patches
+    never leak back into the cached copy.
+    """
+    ckpt_path = folder_paths.get_full_path("checkpoints", ckpt_name)
+    if not ckpt_path or not os.path.exists(ckpt_path):
+        raise ValueError(f"Checkpoint not found: {ckpt_name}")
+    key = file_cache_key(ckpt_path)
+    base = BASE_CHECKPOINTS.get(key)
+    if base is None:
+        PREFETCHER.note_load(ckpt_path)
+        loaded = comfy.sd.load_checkpoint_guess_config(
+            ckpt_path,
+            output_vae=True,
+            output_clip=True,
+            embedding_directory=folder_paths.get_folder_paths("embeddings"),
+        )
+        base = loaded[:3]
+        BASE_CHECKPOINTS.discard_path(key[0])
+        BASE_CHECKPOINTS.put(key, base, 1)
+    model, clip, vae = base
+    model = model.clone() if model is not None else None
+    clip = clip.clone() if clip is not None else None
+    return model, clip, vae, short_sha256(ckpt_path)
+
+
+def load_single_lora(model, clip, lora_name, weight, clip_weight=None, lora_path=None):
+    if clip_weight is None:
+        clip_weight = weight
+    if lora_path is None:
+        lora_path = folder_paths.get_full_path("loras", lora_name)
+    if not lora_path or not os.path.exists(lora_path):
+        return model, clip
+    lora = load_lora_state_dict(lora_path)
+    model, clip = comfy.sd.load_lora_for_models(model, clip, lora, weight, clip_weight)
+    return model, clip
@@ -0,0 +1,215 @@
+"""
+Page-cache prefetch of model files for queued prompts.
+
+With MANGO_PREFETCH=1, every prompt queued through the server is scanned for
+Mango loader nodes, and the checkpoint, UNET, text encoder, VAE and LoRA files
+they reference are read ahead on a background thread (posix_fadvise WILLNEED
+plus a sequential read) while the previous job is still running. Files that
+are already held by the in-memory model caches are skipped. A file already
+read ahead or loaded in this process (and unchanged since) isn't read again;
+it only gets the WILLNEED hint, which costs next to nothing while its pages
+are still cached and starts readahead again if they were evicted, e.g. when
+prompts alternate between more models than fit in RAM. A loader that ComfyUI serves from its own output cache never
+runs, so without this every queued prompt would read its UNET and text
+encoders again in the middle of the running job.
+
+When a loader starts reading a file it calls PREFETCHER.note_load(), which
+stops any read-ahead still running for that file and logs how much of it was
+already warm.
+"""
+
+import os
+import re
+import queue
+import threading
+
+import folder_paths
+from .MangoHashing import BUFFER_SIZE, _env_flag
+
+ENABLED = _env_flag("MANGO_PREFETCH")
+
+# class_type -> {input name: folder_paths category}
+LOADER_INPUTS = {
+    "MangoLoader": {"ckpt_name": "checkpoints"},
+    "MangoLoader10Loras": {"ckpt_name": "checkpoints"},
+    "CompositeMangoLoader": {
+        "unet_name": "diffusion_models",
+        "clip_name1": "text_encoders",
+        "clip_name2": "text_encoders",
+        "vae_name": "vae",
+    },
+    "LoraStackMango": {},
+    "LoraStackDynamicMango": {},
+}
+_LORA_INPUT = re.compile(r"^LoraName\d+$")
+
+
+def _format_gib(n):
+    return f"{n / 2**30:.2f} GiB"
+
+
+class _FileState:
+    __slots__ = ("size", "mtime_ns", "advise_only", "read", "cancelled", "done")
+
+    def __init__(self, size, mtime_ns, advise_only=False):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.advise_only = advise_only
+        self.read = 0
+        self.cancelled = False
+        self.done = False
+
+
+class Prefetcher:
+    """Reads queued files into the page cache on one background thread."""
+
+    def __init__(self, chunk_size=BUFFER_SIZE):
+        self.chunk_size = chunk_size
+        self._jobs = queue.Queue()
+        self._files = {}
+        # realpath -> (size, mtime_ns) of the version already read ahead or loaded
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, paths):
+        """
+        Queue files for read-ahead. Files still queued are ignored; files
+        whose current version was already read ahead or loaded only get the
+        WILLNEED hint. Returns (files queued for reading, bytes queued).
+        """
+        queued = queued_bytes = 0
+        with self._lock:
+            for path in paths:
+                path = os.path.realpath(path)
+                state = self._files.get(path)
+                if state is not None and not state.done:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                advise_only = self._seen.get(path) == (st.st_size, st.st_mtime_ns)
+                self._files[path] = _FileState(st.st_size, st.st_mtime_ns, advise_only)
+                self._jobs.put(path)
+                if not advise_only:
+                    queued += 1
+                    queued_bytes += st.st_size
+            if not self._jobs.empty() and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="mango-prefetch", daemon=True)
+                self._thread.start()
+        return queued, queued_bytes
+
+    def _run(self):
+        while True:
+            path = self._jobs.get()
+            with self._lock:
+                state = self._files.get(path)
+            if state is None or state.cancelled:
+                continue
+            try:
+                self._prefetch(path, state)
+            except OSError as e:
+                print(f"[MangoPrefetch] Could not read ahead {path}: {e}")
+            finally:
+                state.done = True
+                self._mark_seen(path, state)
+
+    def _mark_seen(self, path, state):
+        with self._lock:
+            self._seen[path] = (state.size, state.mtime_ns)
+
+    def _prefetch(self, path, state):
+        buf = bytearray(self.chunk_size)
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            if state.advise_only:
+                return
+            while not state.cancelled:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                state.read += n
+
+    def note_load(self, path, label=None):
+        """
+        Call right before a loader reads path. Stops its read-ahead and logs
+        how many bytes were already warm. Returns that byte count, or None if
+        the file was never queued or only got the WILLNEED hint.
+        """
+        path = os.path.realpath(path)
+        with self._lock:
+            state = self._files.pop(path, None)
+        if state is None or state.advise_only:
+            return None
+        state.cancelled = True
+        self._mark_seen(path, state)
+        warm = min(state.read, state.size)
+        print(f"[MangoPrefetch] {label or os.path.basename(path)}: {_format_gib(warm)} of "
+              f"{_format_gib(state.size)} warm at load ({warm / state.size if state.size else 1:.0%})")
+        return warm
+
+
+PREFETCHER = Prefetcher()
+
+
+def _full_path(category, name):
+    if not isinstance(name, str) or not name or name == "None":
+        return None
+    path = folder_paths.get_full_path(category, name)
+    return path if path and os.path.isfile(path) else None
+
+
+def _is_cached(path):
+    # Imported here: the model cache itself reports loads to PREFETCHER.
+    from .MangoModelCache import BASE_CHECKPOINTS, LORA_STATE_DICTS, VAES
+    real = os.path.realpath(path)
+    return any(cache.has_path(real) for cache in (BASE_CHECKPOINTS, LORA_STATE_DICTS, VAES))
+
+
+def prompt_model_paths(prompt):
+    """Resolve the model files referenced by Mango loader nodes in a prompt graph."""
+    paths = []
+    for node in (prompt or {}).values():
+        class_type = node.get("class_type")
+        if class_type not in LOADER_INPUTS:
+            continue
+        inputs = node.get("inputs", {})
+        for input_name, value in inputs.items():
+            if input_name in LOADER_INPUTS[class_type]:
+                paths.append(_full_path(LOADER_INPUTS[class_type][input_name], value))
+            elif _LORA_INPUT.match(input_name):
+                paths.append(_full_path("loras", value))
+        if class_type == "LoraStackDynamicMango" and isinstance(inputs.get("loras"), str):
+            from .LoraStackDynamicMango import LoraStackDynamicMango
+            lookup = LoraStackDynamicMango._name_lookup()
+            for name, _, _ in LoraStackDynamicMango.parse_lines(inputs["loras"]):
+                paths.append(_full_path("loras", lookup.get(name) or lookup.get(name.lower())))
+    seen = set()
+    return [p for p in paths if p and not (p in seen or seen.add(p))]
+
+
+def _on_prompt(json_data):
+    try:
+        paths = [p for p in prompt_model_paths(json_data.get("prompt")) if not _is_cached(p)]
+        queued, queued_bytes = PREFETCHER.submit(paths)
+        if queued:
+            print(f"[MangoPrefetch] Reading ahead {queued} model files ({_format_gib(queued_bytes)})")
+    except Exception as e:
+        print(f"[MangoPrefetch] Skipping prefetch for queued prompt: {e}")
+    return json_data
+
+
+def install_prompt_handler():
+    """Register the on-prompt hook. Does nothing unless MANGO_PREFETCH is set."""
+    if not ENABLED:
+        return False
+    try:
+        from server import PromptServer
+        PromptServer.instance.add_on_prompt_handler(_on_prompt)
+    except (ImportError, AttributeError) as e:
+        print(f"[MangoPrefetch] Prefetch unavailable: {e}")
+        return False
+    return True
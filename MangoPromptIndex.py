@@ -0,0 +1,295 @@
+"""
+Index of saved prompt files.
+
+PromptSave appends one JSON line per saved prompt to mango_prompt_index.jsonl
+in the output directory: path (relative to the output directory), prefix,
+size, mtime_ns and the SHA-256 of the text. MangoPromptLoad lists prompts from
+this file instead of walking the whole output tree. New lines are read
+incrementally, so listing costs one stat while nothing has been saved.
+
+Each line goes out in a single O_APPEND write, so several ComfyUI processes
+can save into the same output directory. When the index file doesn't exist
+yet, it is rebuilt from a scan of the output tree that stops after reading
+MANGO_PROMPT_SCAN_MAX directory entries (default 100000), even in the middle
+of a folder; where it stopped is recorded as pending and later refreshes
+carry on from there before doing anything else.
+
+The index also records every folder it has scanned, with its mtime if the
+folder holds prompts. refresh() stats only those prompt folders and rescans
+the ones that changed, which picks up .txt files copied in or deleted by hand
+without listing image folders again. A .txt dropped into a folder that had
+no prompts when it was scanned shows up after a rebuild (delete the index).
+
+Besides prompt records, a line can be a removed prompt ({"path", "deleted"}),
+a scanned folder ({"dir", "mtime_ns"}) or the pending scan positions
+({"pending"}); later lines win. Once superseded lines outnumber the live
+ones, refresh() rewrites the file with just the latest state.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import deque
+
+INDEX_NAME = "mango_prompt_index.jsonl"
+MAX_SCAN_ENTRIES = max(1, int(os.environ.get("MANGO_PROMPT_SCAN_MAX", "100000")))
+COMPACT_MIN_LINES = 1000
+_NUMBERED = re.compile(r"^(.*)_(\d+)\.txt$", re.IGNORECASE)
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def prompt_prefix(file_name):
+    m = _NUMBERED.match(file_name)
+    return m.group(1) if m else os.path.splitext(file_name)[0]
+
+
+class PromptIndex:
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, INDEX_NAME)
+        self._entries = {}
+        self._dirs = {}
+        self._pending = []
+        self._offset = 0
+        self._inode = None
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _record(self, full_path, prefix, text):
+        st = os.stat(full_path)
+        return {
+            "path": os.path.relpath(full_path, self.root),
+            "prefix": prefix,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": text_sha256(text),
+        }
+
+    def _append(self, records):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def add(self, full_path, prefix, text):
+        """Append the prompt just written to full_path."""
+        if not self.exists():
+            # First save into this output folder: pick up older prompts too.
+            self.rebuild()
+        record = self._record(full_path, prefix, text)
+        self._append([record])
+        return record
+
+    def forget(self, rel_path):
+        """Drop a prompt whose file is gone."""
+        self._append([{"path": rel_path, "deleted": True}])
+
+    def _read_new(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._entries, self._dirs, self._pending = {}, {}, []
+            self._offset, self._inode, self._lines = 0, None, 0
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Replaced by a rebuild (or truncated): start over.
+            self._entries, self._dirs, self._pending = {}, {}, []
+            self._offset, self._inode, self._lines = 0, st.st_ino, 0
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being written by another process is picked up next time.
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            self._lines += 1
+            try:
+                record = json.loads(line)
+                if "dir" in record:
+                    if record.get("deleted"):
+                        self._dirs.pop(record["dir"], None)
+                    else:
+                        self._dirs[record["dir"]] = record["mtime_ns"]
+                elif "pending" in record:
+                    self._pending = [list(item) for item in record["pending"]]
+                elif record.get("deleted"):
+                    self._entries.pop(record["path"], None)
+                else:
+                    self._entries[record["path"]] = record
+            except (ValueError, KeyError, TypeError):
+                continue
+        self._offset += complete
+
+    def entries(self):
+        """{relative path: record}, latest record per path."""
+        with self._lock:
+            self._read_new()
+            return dict(self._entries)
+
+    def names(self):
+        return sorted(self.entries())
+
+    def _scan(self, queue, entries, known_dirs, max_entries):
+        """
+        Scan the folders in queue breadth-first, reading at most max_entries
+        directory entries. Queue items are [folder relative to root, entries
+        already read, folder mtime_ns]; a folder the cap cuts short goes back
+        to the front with its position. Folders not in known_dirs are new, so
+        their subfolders are queued too. Returns the index lines for new,
+        changed and removed prompts and the finished folders, plus the queue
+        left over.
+        """
+        lines, visited = [], 0
+        queue = deque(queue)
+        queued = {rel_dir for rel_dir, _, _ in queue}
+        txt_dirs = {os.path.dirname(rel_path) for rel_path in entries}
+        while queue and visited < max_entries:
+            rel_dir, skip, mtime_ns = queue.popleft()
+            folder = os.path.join(self.root, rel_dir)
+            try:
+                if not skip:
+                    mtime_ns = os.stat(folder).st_mtime_ns
+                it = os.scandir(folder)
+            except OSError:
+                lines.extend({"path": rel_path, "deleted": True}
+                             for rel_path in entries if os.path.dirname(rel_path) == rel_dir)
+                lines.append({"dir": rel_dir, "deleted": True})
+                continue
+            present, read, finished = set(), 0, True
+            with it:
+                for entry in it:
+                    read += 1
+                    if read <= skip:
+                        continue
+                    if visited >= max_entries:
+                        finished = False
+                        read -= 1
+                        break
+                    visited += 1
+                    rel_path = os.path.join(rel_dir, entry.name)
+                    try:
+                        if entry.is_dir():
+                            if rel_path not in known_dirs and rel_path not in queued:
+                                queue.append([rel_path, 0, None])
+                                queued.add(rel_path)
+                            continue
+                        if not entry.name.lower().endswith(".txt"):
+                            continue
+                        present.add(rel_path)
+                        txt_dirs.add(rel_dir)
+                        st = entry.stat()
+                        known = entries.get(rel_path)
+                        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+                            continue
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            lines.append(self._record(entry.path, prompt_prefix(entry.name), f.read()))
+                    except (OSError, UnicodeDecodeError):
+                        continue
+            if not finished:
+                queue.appendleft([rel_dir, read, mtime_ns])
+                break
+            if not skip:
+                # Only a folder read in one go shows which prompts are gone.
+                lines.extend({"path": rel_path, "deleted": True}
+                             for rel_path in entries
+                             if os.path.dirname(rel_path) == rel_dir and rel_path not in present)
+            # Folders without prompts aren't watched: image folders change on
+            # every save, and rescanning them is what this index avoids.
+            lines.append({"dir": rel_dir, "mtime_ns": mtime_ns if rel_dir in txt_dirs else None})
+        return lines, [list(item) for item in queue]
+
+    def refresh(self, max_entries=MAX_SCAN_ENTRIES):
+        """
+        Scan the folders a capped scan left pending, then rescan the folders
+        holding prompts whose mtime changed since they were indexed. Returns
+        the number of prompts added, changed or removed.
+        """
+        self._compact_if_needed()
+        with self._lock:
+            self._read_new()
+            entries, dirs, pending = dict(self._entries), dict(self._dirs), list(self._pending)
+        watched = {rel_dir for rel_dir, mtime_ns in dirs.items() if mtime_ns is not None}
+        watched.update(os.path.dirname(rel_path) for rel_path in entries)
+        queued = {rel_dir for rel_dir, _, _ in pending}
+        changed = []
+        for rel_dir in sorted(watched - queued):
+            try:
+                if os.stat(os.path.join(self.root, rel_dir)).st_mtime_ns == dirs.get(rel_dir):
+                    continue
+            except OSError:
+                pass
+            changed.append([rel_dir, 0, None])
+        if not changed and not pending:
+            return 0
+        lines, left = self._scan(pending + changed, entries, dirs, max_entries)
+        if left or pending:
+            lines.append({"pending": left})
+        self._append(lines)
+        updated = sum(1 for line in lines if "path" in line)
+        if updated or left:
+            print(f"[MangoPromptIndex] Updated {updated} prompt files"
+                  + (f" ({len(left)} folders left to scan)" if left else ""))
+        return updated
+
+    def _write(self, lines):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _compact_if_needed(self):
+        # Superseded prompt, folder and pending lines pile up; once they
+        # outnumber the live ones, rewrite the file with just the latest.
+        with self._lock:
+            self._read_new()
+            live = len(self._entries) + len(self._dirs) + 1
+            if self._lines < COMPACT_MIN_LINES or self._lines < 2 * live:
+                return
+            lines = list(self._entries.values())
+            lines.extend({"dir": rel_dir, "mtime_ns": mtime_ns} for rel_dir, mtime_ns in self._dirs.items())
+            if self._pending:
+                lines.append({"pending": self._pending})
+            self._write(lines)
+            self._read_new()
+
+    def rebuild(self, max_entries=MAX_SCAN_ENTRIES):
+        """
+        Recreate the index from .txt files under root, reading at most
+        max_entries directory entries; the folders it doesn't finish are left
+        for refresh(). Returns the number of prompts indexed.
+        """
+        lines, left = self._scan([["", 0, None]], {}, {}, max_entries)
+        if left:
+            lines.append({"pending": left})
+        self._write(lines)
+        count = sum(1 for line in lines if "path" in line)
+        print(f"[MangoPromptIndex] Indexed {count} prompt files"
+              + (f" ({len(left)} folders left for later scans)" if left else ""))
+        return count
+
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def prompt_index(root):
+    """Shared PromptIndex for an output directory."""
+    root = os.path.abspath(root)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(root)
+        if index is None:
+            index = _INDEXES[root] = PromptIndex(root)
+        return index
@@ -1,5 +1,6 @@
 import os
 import folder_paths
+from .MangoPromptIndex import prompt_index
 
 class MangoPromptLoad:
     @classmethod
@@ -7,19 +8,21 @@ class MangoPromptLoad:
         output_dir = folder_paths.get_output_directory()
         choices = []
         if output_dir and os.path.exists(output_dir):
-            # Recursively search for .txt files in output_dir and subdirectories
-            for root, dirs, files in os.walk(output_dir):
-                for file in files:
-                    if file.lower().endswith(".txt"):
-                        rel_path = os.path.relpath(os.path.join(root, file), output_dir)
-                        choices.append(rel_path)
-        choices = sorted(choices)
+            # Prompts from the prompt index; built by a bounded scan of the
+            # output folder if it doesn't exist yet, otherwise only folders
+            # that changed since the last look are rescanned.
+            index = prompt_index(output_dir)
+            if not index.exists():
+                index.rebuild()
+            else:
+                index.refresh()
+            choices = index.names()
         # Provide a fallback if no files found
         if not choices:
             choices = [""]
         return {
             "required": {
-                "filename": (choices, {"tooltip": "Select a .txt file from the output folder and its subfolders."})
+                "filename": (choices, {"tooltip": "Select a prompt .txt file from the output folder's prompt index (mango_prompt_index.jsonl)."})
             }
         }
 
@@ -27,8 +30,10 @@ class MangoPromptLoad:
     FUNCTION = "load_prompt"
     CATEGORY = "Mango Node Pack/Metadata"
     DESCRIPTION = (
-        "Loads prompt text from a .txt file found in the default ComfyUI output folder "
-        "and all its subfolders. Perfect to serve up a prompt for PromptMango!"
+        "Loads prompt text from a .txt file listed in the prompt index of the default ComfyUI "
+        "output folder. Prompts saved by PromptSave are added right away; .txt files copied in "
+        "or deleted by hand are picked up when the node list is refreshed. "
+        "Perfect to serve up a prompt for PromptMango!"
     )
 
     def load_prompt(self, filename):
@@ -40,6 +45,8 @@ class MangoPromptLoad:
         full_path = os.path.join(output_dir, filename)
         if not os.path.exists(full_path):
             print(f"Error: File {full_path} not found.")
+            # Don't offer it again.
+            prompt_index(output_dir).forget(filename)
             return ("",)
 
         try:
@@ -1,7 +1,9 @@
 import os
-import re
 from datetime import datetime
 import folder_paths
+from .MangoPromptIndex import prompt_index, text_sha256
+from .MangoPromptStore import PROMPT_STORE
+from .MangoCounters import SUFFIX_COUNTER
 
 class PromptSave:
 
@@ -12,6 +14,9 @@ class PromptSave:
                 "prompt": ("STRING", {"multiline": True, "tooltip": "The prompt text to save."}),
                 "filename_prefix": ("STRING", {"default": "Prompt", "tooltip": "Base name for the saved prompt file."}),
                 "subdirectory_name": ("STRING", {"default": "Prompts", "tooltip": "Subfolder (inside the output folder) to save the prompt."}),
+            },
+            "optional": {
+                "deduplicate": ("BOOLEAN", {"default": False, "tooltip": "Don't write a new file if this exact prompt is already saved."}),
             }
         }
     OUTPUT_NODE = True
@@ -20,7 +25,7 @@ class PromptSave:
     CATEGORY = "Mango Node Pack/Metadata"
     DESCRIPTION = "Saves prompt text to a .txt file with a simple incrementing suffix."
 
-    def save_prompt(self, prompt, filename_prefix="Prompt", subdirectory_name="Prompts"):
+    def save_prompt(self, prompt, filename_prefix="Prompt", subdirectory_name="Prompts", deduplicate=False):
         try:
             # Get the output directory from folder_paths.
             output_dir = folder_paths.get_output_directory()
@@ -28,31 +33,29 @@ class PromptSave:
                 print("Error: Output directory not found!")
                 return ("",)
 
+            sha256 = text_sha256(prompt)
+            if deduplicate:
+                existing = PROMPT_STORE.find(sha256)
+                # Stored paths are relative to the output directory, or absolute
+                # for imported files outside it (join keeps those as they are).
+                if existing and existing["path"] and os.path.exists(os.path.join(output_dir, existing["path"])):
+                    PROMPT_STORE.add(prompt, sha256=sha256)
+                    print("Prompt already saved as:", existing["path"])
+                    return (prompt,)
+
             # Determine the target folder.
             full_output_folder = os.path.join(output_dir, subdirectory_name) if subdirectory_name else output_dir
             os.makedirs(full_output_folder, exist_ok=True)
 
-            # Find the next available file number.
-            pattern = re.compile(rf"^{re.escape(filename_prefix)}_(\d+)\.txt$")
-            max_num = 0
-            for f in os.listdir(full_output_folder):
-                m = pattern.match(f)
-                if m:
-                    try:
-                        num = int(m.group(1))
-                        if num > max_num:
-                            max_num = num
-                    except Exception as e:
-                        print("Error parsing file number in file", f, ":", e)
-            next_num = max_num + 1
-
-            file_name = f"{filename_prefix}_{next_num}.txt"
-            full_path = os.path.join(full_output_folder, file_name)
+            # Claim the next file number.
+            [(_, full_path)] = SUFFIX_COUNTER.reserve(full_output_folder, filename_prefix, "txt", width=0)
             print("Saving prompt to:", full_path)
 
             # Save the prompt using UTF-8 encoding.
             with open(full_path, "w", encoding="utf-8") as f:
                 f.write(prompt)
+            prompt_index(output_dir).add(full_path, filename_prefix, prompt)
+            PROMPT_STORE.add(prompt, os.path.relpath(full_path, output_dir), filename_prefix, sha256)
 
             return (prompt,)
         except Exception as e:
@@ -0,0 +1,36 @@
+from .MangoPromptStore import PROMPT_STORE
+
+class MangoPromptSearch:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "query": ("STRING", {"default": "", "tooltip": "Words to search for in saved prompts. Empty returns the most recently used."}),
+                "top_k": ("INT", {"default": 5, "min": 1, "max": 100, "tooltip": "Number of matches to return."}),
+                "pick": ("INT", {"default": 0, "min": 0, "max": 99, "tooltip": "Which match (0 = best) is returned as prompt."}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("prompt", "matches")
+    FUNCTION = "search"
+    CATEGORY = "Mango Node Pack/Metadata"
+    DESCRIPTION = (
+        "Full-text search over every prompt saved with Save Prompt (Mango). "
+        "Returns the chosen match and a numbered list of the top matches."
+    )
+
+    @classmethod
+    def IS_CHANGED(cls, query, top_k, pick):
+        return str(PROMPT_STORE.generation())
+
+    def search(self, query, top_k=5, pick=0):
+        results = PROMPT_STORE.search(query, limit=top_k)
+        if not results:
+            print(f"[MangoPromptSearch] No saved prompts match '{query}'")
+            return ("", "")
+        prompt = results[min(pick, len(results) - 1)]["text"]
+        matches = "\n\n".join(
+            f"[{i}] {r['path'] or r['sha256'][:10]}\n{r['text']}" for i, r in enumerate(results)
+        )
+        return (prompt, matches)
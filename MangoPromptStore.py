@@ -0,0 +1,184 @@
+"""
+Searchable prompt library.
+
+Every prompt saved by PromptSave is also stored in prompt_library.sqlite (WAL
+mode, next to this file), one row per distinct text keyed by its SHA-256, and
+indexed with SQLite FTS5 so Prompt Search (Mango) can return the best matches
+for a query among tens of thousands of prompts. Saving a text that is already
+in the library only bumps its use count.
+
+Stored paths are relative to the ComfyUI output directory, like PromptSave
+writes them, or absolute for files outside it. Existing .txt prompts can be
+imported with import_directory(), e.g. through
+`python -m custom_nodes.MangoNodePack.index --import-prompts <folder>`.
+If the SQLite build lacks FTS5, search falls back to substring matching.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import threading
+
+from .MangoPromptIndex import prompt_prefix, text_sha256
+
+STORE_DIR = os.path.dirname(__file__)
+DB_PATH = os.path.join(STORE_DIR, "prompt_library.sqlite")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class PromptStore:
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.fts = False
+        self._lock = threading.RLock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompts ("
+            " id INTEGER PRIMARY KEY,"
+            " sha256 TEXT NOT NULL UNIQUE,"
+            " text TEXT NOT NULL,"
+            " path TEXT,"
+            " prefix TEXT,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " uses INTEGER NOT NULL DEFAULT 1)"
+        )
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts"
+                " USING fts5(text, content='prompts', content_rowid='id')"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS prompts_ai AFTER INSERT ON prompts BEGIN"
+                " INSERT INTO prompts_fts(rowid, text) VALUES (new.id, new.text); END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS prompts_ad AFTER DELETE ON prompts BEGIN"
+                " INSERT INTO prompts_fts(prompts_fts, rowid, text) VALUES ('delete', old.id, old.text); END"
+            )
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"[MangoPromptStore] FTS5 unavailable, search falls back to substring matching: {e}")
+        self._conn = conn
+        return conn
+
+    def find(self, sha256):
+        """Return the stored row for a content hash as a dict, or None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, sha256, text, path, prefix, uses FROM prompts WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def add(self, text, path=None, prefix=None, sha256=None):
+        """
+        Store a prompt. Returns (row, created): an identical text already in
+        the library is not stored again, only its use count is bumped.
+        """
+        sha256 = sha256 or text_sha256(text)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO prompts (sha256, text, path, prefix, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, text, path, prefix, now, now),
+            )
+            created = cursor.rowcount == 1
+            if not created:
+                # Point at the most recently saved copy.
+                conn.execute(
+                    "UPDATE prompts SET uses = uses + 1, last_used = ?,"
+                    " path = COALESCE(?, path), prefix = COALESCE(?, prefix) WHERE sha256 = ?",
+                    (now, path, prefix, sha256),
+                )
+        return self.find(sha256), created
+
+    def search(self, query, limit=5):
+        """Best matches for query (all words must match, prefixes allowed), most relevant first."""
+        words = _TOKEN.findall(query or "")
+        with self._lock:
+            conn = self._connect()
+            if not words:
+                rows = conn.execute(
+                    "SELECT id, sha256, text, path, prefix, uses FROM prompts ORDER BY last_used DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            elif self.fts:
+                match = " ".join('"{}"*'.format(w.replace('"', '""')) for w in words)
+                rows = conn.execute(
+                    "SELECT p.id, p.sha256, p.text, p.path, p.prefix, p.uses"
+                    " FROM prompts_fts JOIN prompts p ON p.id = prompts_fts.rowid"
+                    " WHERE prompts_fts MATCH ? ORDER BY bm25(prompts_fts), p.uses DESC LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            else:
+                where = " AND ".join("text LIKE ?" for _ in words)
+                rows = conn.execute(
+                    "SELECT id, sha256, text, path, prefix, uses FROM prompts WHERE " + where +
+                    " ORDER BY uses DESC, last_used DESC LIMIT ?",
+                    [f"%{w}%" for w in words] + [limit],
+                ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def import_directory(self, root, base=None):
+        """
+        Import every .txt file under root, storing paths relative to base
+        (the output directory) when they are inside it and absolute
+        otherwise. Returns (files read, prompts added).
+        """
+        base = os.path.abspath(base) if base else None
+        read = added = 0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for dirpath, _, filenames in os.walk(root):
+                    for name in filenames:
+                        if not name.lower().endswith(".txt"):
+                            continue
+                        full_path = os.path.join(dirpath, name)
+                        try:
+                            with open(full_path, "r", encoding="utf-8") as f:
+                                text = f.read()
+                        except (OSError, UnicodeDecodeError):
+                            continue
+                        read += 1
+                        if not text.strip():
+                            continue
+                        _, created = self.add(text, self.stored_path(full_path, base), prompt_prefix(name))
+                        added += created
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return read, added
+
+    @staticmethod
+    def stored_path(full_path, base):
+        full_path = os.path.abspath(full_path)
+        if base and os.path.commonpath([full_path, base]) == base:
+            return os.path.relpath(full_path, base)
+        return full_path
+
+    def generation(self):
+        """Changes whenever prompts are added or used; for IS_CHANGED."""
+        with self._lock:
+            return self._connect().execute("SELECT count(*), max(last_used) FROM prompts").fetchone()
+
+    @staticmethod
+    def _row(row):
+        return dict(zip(("id", "sha256", "text", "path", "prefix", "uses"), row))
+
+
+PROMPT_STORE = PromptStore()
@@ -0,0 +1,125 @@
+"""
+Header-only safetensors reader.
+
+A safetensors file starts with an 8-byte little-endian header length followed
+by a JSON header describing every tensor plus an optional "__metadata__" map
+of strings. Reading just that much is enough for trigger words and training
+info, without opening the file through safetensors/torch.
+"""
+
+import json
+import struct
+from typing import NamedTuple
+
+# Same cap as the safetensors library. Real LoRA headers are a few MiB at
+# most, so a larger length field means the file is corrupt.
+MAX_HEADER_SIZE = 100 * 1024 * 1024
+
+
+class LoraSummary(NamedTuple):
+    triggers: list
+    tags: list
+    network_dim: int
+    network_alpha: float
+    base_model: str
+    tensor_count: int
+    metadata: dict
+
+
+def read_safetensors_header(path):
+    """Return the parsed JSON header of a safetensors file."""
+    with open(path, "rb") as f:
+        prefix = f.read(8)
+        if len(prefix) != 8:
+            raise ValueError(f"{path} is too small to be a safetensors file")
+        (length,) = struct.unpack("<Q", prefix)
+        if length > MAX_HEADER_SIZE:
+            raise ValueError(f"{path} has an implausible safetensors header size ({length} bytes)")
+        raw = f.read(length)
+    if len(raw) != length:
+        raise ValueError(f"{path} has a truncated safetensors header")
+    header = json.loads(raw)
+    if not isinstance(header, dict):
+        raise ValueError(f"{path} has an invalid safetensors header")
+    return header
+
+
+def read_safetensors_metadata(path):
+    """Return the "__metadata__" map of a safetensors file ({} if absent)."""
+    return read_safetensors_header(path).get("__metadata__") or {}
+
+
+def extract_trigger_words_from_metadata(meta):
+    triggers_found = set()
+
+    if "trainedWords" in meta and meta["trainedWords"]:
+        val = meta["trainedWords"]
+        if isinstance(val, str):
+            triggers_found.update(x.strip() for x in val.split(",") if x.strip())
+        elif isinstance(val, list):
+            triggers_found.update(val)
+        elif isinstance(val, dict):
+            triggers_found.update(val.keys())
+
+    if "modelspec.trigger_phrase" in meta:
+        trigger_phrase = meta["modelspec.trigger_phrase"]
+        if isinstance(trigger_phrase, str) and trigger_phrase.strip():
+            triggers_found.add(trigger_phrase.strip())
+
+    return list(triggers_found)
+
+
+def _number(value, cast):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _training_tags(meta):
+    # ss_tag_frequency is {"dataset dir": {"tag": count}} serialised as JSON.
+    try:
+        frequency = json.loads(meta.get("ss_tag_frequency") or "{}")
+    except ValueError:
+        return []
+    counts = {}
+    if isinstance(frequency, dict):
+        for dataset in frequency.values():
+            if isinstance(dataset, dict):
+                for tag, count in dataset.items():
+                    tag = tag.strip()
+                    if tag:
+                        counts[tag] = counts.get(tag, 0) + (_number(count, int) or 0)
+    return sorted(counts, key=lambda t: (-counts[t], t))
+
+
+def summarize_lora(path):
+    """Read only the header of a LoRA and return a LoraSummary."""
+    header = read_safetensors_header(path)
+    meta = header.get("__metadata__") or {}
+    tensors = {k: v for k, v in header.items() if k != "__metadata__"}
+
+    network_dim = _number(meta.get("ss_network_dim"), int)
+    if network_dim is None:
+        # Fall back to the rank of the first down projection.
+        for key, info in tensors.items():
+            if key.endswith(("lora_down.weight", "lora_A.weight")) and info.get("shape"):
+                network_dim = info["shape"][0]
+                break
+
+    base_model = (
+        meta.get("ss_base_model_version")
+        or meta.get("modelspec.architecture")
+        or meta.get("ss_sd_model_name")
+        or ""
+    )
+
+    return LoraSummary(
+        triggers=extract_trigger_words_from_metadata(meta),
+        tags=_training_tags(meta),
+        network_dim=network_dim,
+        network_alpha=_number(meta.get("ss_network_alpha"), float),
+        base_model=base_model,
+        tensor_count=len(tensors),
+        metadata=meta,
+    )
@@ -1,99 +1,193 @@
 """
 Dependencies:
-- pip install safetensors
 - ComfyUI's 'folder_paths' for locating LoRA files.
+- requests for Civitai lookups (MangoCivitai).
+Local metadata is read straight from the safetensors header (MangoSafetensors).
+
+Each cached entry records how its triggers were found ("status": found /
+not_found / error) and when ("checked_at"). Misses are re-checked on Civitai
+after MANGO_TRIGGER_MISS_TTL seconds (default 7 days), transient errors after
+MANGO_TRIGGER_ERROR_TTL seconds (default 15 minutes).
 """
 
 import os
-import hashlib
-import json
-import requests
-
-try:
-    from safetensors import safe_open
-except ImportError:
-    safe_open = None
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import folder_paths
+from .MangoCivitai import CIVITAI
+from .MangoSafetensors import summarize_lora
+from .MangoHashing import file_sha256
+from .MangoMetadataStore import LORA_METADATA
+
+NOT_FOUND_TTL = float(os.environ.get("MANGO_TRIGGER_MISS_TTL", 7 * 24 * 3600))
+ERROR_TTL = float(os.environ.get("MANGO_TRIGGER_ERROR_TTL", 15 * 60))
 
 #METADATA FETCHING
 
 def calculate_sha256(file_path):
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(chunk)
-    return sha256_hash.hexdigest()
+    return file_sha256(file_path)
 
 def get_model_version_info(hash_value):
-    api_url = f"https://civitai.com/api/v1/model-versions/by-hash/{hash_value}"
-    response = requests.get(api_url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return {}
+    return CIVITAI.model_version_by_hash(hash_value)
 
-def parse_local_safetensors_metadata(lora_path):
-    if not safe_open:
-        return {}
+def lookup_civitai_triggers(sha256):
+    """Return (trigger list, status) for a Civitai by-hash lookup."""
     try:
-        with safe_open(lora_path, framework="pt", device="cpu") as f:
-            meta = f.metadata() or {}
-            print(f"DEBUG: Safetensors metadata for {lora_path} -> {meta}")
-            return meta
+        model_info = get_model_version_info(sha256)
     except Exception as e:
-        print(f"Failed reading local safetensors metadata for {lora_path}: {e}")
-        return {}
-
-def extract_trigger_words_from_metadata(meta):
-    triggers_found = set()
-
-    if "trainedWords" in meta and meta["trainedWords"]:
-        val = meta["trainedWords"]
-        if isinstance(val, str):
-            triggers_found.update(x.strip() for x in val.split(",") if x.strip())
-        elif isinstance(val, list):
-            triggers_found.update(val)
-        elif isinstance(val, dict):
-            triggers_found.update(val.keys())
-
-    if "modelspec.trigger_phrase" in meta:
-        trigger_phrase = meta["modelspec.trigger_phrase"]
-        if isinstance(trigger_phrase, str) and trigger_phrase.strip():
-            triggers_found.add(trigger_phrase.strip())
-
-    return list(triggers_found)
+        print(f"Civitai lookup failed for {sha256[:10]}: {e}")
+        return [], "error"
+    triggers = model_info.get("trainedWords") or []
+    return triggers, ("found" if triggers else "not_found")
+
+def lora_fingerprint(lora_path):
+    st = os.stat(lora_path)
+    return {"path": lora_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def is_entry_current(entry, lora_path, fingerprint):
+    """
+    Cheap check first (size + mtime), then content hash, so a touched but
+    unchanged file keeps its entry and a replaced one is re-parsed.
+    """
+    if "size" not in entry:
+        # Entry from before fingerprints were recorded; adopt it.
+        return True
+    if entry["size"] != fingerprint["size"]:
+        return False
+    if entry.get("mtime_ns") == fingerprint["mtime_ns"]:
+        return True
+    return bool(entry.get("sha256")) and calculate_sha256(lora_path) == entry["sha256"]
+
+def needs_refresh(entry, now=None):
+    """True when a cached miss or error has outlived its TTL."""
+    status = entry.get("status")
+    if status is None:
+        # Entry from before statuses were recorded.
+        status = "found" if entry.get("triggerWords") else "not_found"
+    if status == "found":
+        return False
+    if status == "unchecked":
+        # Indexed offline; Civitai has not been asked yet.
+        return True
+    ttl = ERROR_TTL if status == "error" else NOT_FOUND_TTL
+    return (now or time.time()) - entry.get("checked_at", 0) >= ttl
+
+def _save_entry(lora_name, entry):
+    try:
+        LORA_METADATA.set(lora_name, entry)
+    except Exception as e:
+        print(f"Error saving metadata cache: {e}")
+    return entry
 
-def get_lora_metadata(lora_name):
-    db_path = os.path.join(os.path.dirname(__file__), 'lora_metadata_db.json')
+def summarize_local_lora(lora_path):
+    if not lora_path.lower().endswith(".safetensors"):
+        return None
     try:
-        with open(db_path, 'r') as f:
-            db = json.load(f)
-    except Exception:
-        db = {}
-    if lora_name in db:
-        return db[lora_name]
+        return summarize_lora(lora_path)
+    except Exception as e:
+        print(f"Failed reading local safetensors metadata for {lora_path}: {e}")
+        return None
+
+def is_lora_metadata_fresh(lora_name, query_api=True):
+    """True if get_lora_metadata would be served from the cache without any file or network I/O."""
+    lora_path = folder_paths.get_full_path("loras", lora_name)
+    if not lora_path or not os.path.exists(lora_path):
+        return False
+    cached = LORA_METADATA.get(lora_name)
+    if cached is None:
+        return False
+    fingerprint = lora_fingerprint(lora_path)
+    if any(cached.get(k) != v for k, v in fingerprint.items()) or "sha256" not in cached:
+        return False
+    return not (query_api and needs_refresh(cached))
+
+def get_lora_metadata(lora_name, query_api=True):
+    """
+    Trigger words and file info for a LoRA, from the cache when still valid.
+    With query_api=False, Civitai is never contacted; LoRAs without local
+    triggers are stored as "unchecked" so a later online call looks them up.
+    """
     lora_path = folder_paths.get_full_path("loras", lora_name)
-    if not os.path.exists(lora_path):
-        db[lora_name] = {"triggerWords": ""}
-        with open(db_path, 'w') as f:
-            json.dump(db, f, indent=4)
-        return db[lora_name]
-    meta = parse_local_safetensors_metadata(lora_path)
-    local_triggers = extract_trigger_words_from_metadata(meta)
-    if not local_triggers:
-        LORAsha256 = calculate_sha256(lora_path)
-        model_info = get_model_version_info(LORAsha256)
-        if model_info.get("trainedWords"):
-            local_triggers = model_info["trainedWords"]
+    if not lora_path or not os.path.exists(lora_path):
+        # Not cached: the file may show up later.
+        return {"triggerWords": ""}
+    fingerprint = lora_fingerprint(lora_path)
+
+    cached = LORA_METADATA.get(lora_name)
+    if cached is not None and is_entry_current(cached, lora_path, fingerprint):
+        if query_api and needs_refresh(cached):
+            # Same file, so only the Civitai side can have changed.
+            sha256 = cached.get("sha256") or calculate_sha256(lora_path)
+            triggers, status = lookup_civitai_triggers(sha256)
+            entry = dict(cached, **fingerprint, sha256=sha256, status=status, checked_at=time.time())
+            if status != "error":
+                entry["triggerWords"] = ", ".join(triggers)
+                entry["source"] = "civitai"
+            return _save_entry(lora_name, entry)
+        if any(cached.get(k) != v for k, v in fingerprint.items()):
+            cached = dict(cached, **fingerprint)
+            if "sha256" not in cached:
+                cached["sha256"] = calculate_sha256(lora_path)
+            _save_entry(lora_name, cached)
+        return cached
+
+    summary = summarize_local_lora(lora_path)
+    local_triggers = summary.triggers if summary else []
+    LORAsha256 = calculate_sha256(lora_path)
+    if local_triggers:
+        status, source = "found", "local"
+    elif query_api:
+        local_triggers, status = lookup_civitai_triggers(LORAsha256)
+        source = "civitai"
+    else:
+        status, source = "unchecked", None
     triggers_str = ", ".join(local_triggers)
-    db[lora_name] = {"triggerWords": triggers_str}
-    try:
-        with open(db_path, 'w') as f:
-            json.dump(db, f, indent=4)
-    except Exception as e:
-        print(f"Error saving metadata cache: {e}")
-    return db[lora_name]
+    entry = {
+        "triggerWords": triggers_str,
+        "status": status,
+        "source": source,
+        "checked_at": time.time(),
+        "sha256": LORAsha256,
+        **fingerprint,
+    }
+    if summary:
+        entry.update({
+            "baseModel": summary.base_model,
+            "networkDim": summary.network_dim,
+            "networkAlpha": summary.network_alpha,
+            "tensorCount": summary.tensor_count,
+        })
+    return _save_entry(lora_name, entry)
+
+def get_lora_metadata_many(lora_names):
+    """
+    Resolve several LoRAs concurrently (bounded by the Civitai client's
+    parallelism). Returns {name: metadata dict or the exception raised}.
+    """
+    unique = list(dict.fromkeys(lora_names))
+    results = {}
+    if len(unique) <= 1:
+        for name in unique:
+            try:
+                results[name] = get_lora_metadata(name)
+            except Exception as e:
+                results[name] = e
+        return results
+    with ThreadPoolExecutor(max_workers=min(CIVITAI.max_parallel, len(unique))) as pool:
+        futures = {name: pool.submit(get_lora_metadata, name) for name in unique}
+        for name, fut in futures.items():
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                results[name] = e
+    return results
+
+def prune_lora_metadata(dry_run=False):
+    """Drop cache entries whose LoRA file no longer exists. Returns the pruned names."""
+    def resolve(name, entry):
+        return entry.get("path") or folder_paths.get_full_path("loras", name)
+    return LORA_METADATA.prune(resolve, dry_run=dry_run)
 
 #NODE
 
@@ -111,16 +205,50 @@ class MangoTriggerExporter:
     CATEGORY = "Mango Node Pack/Metadata"
 
     def export_triggerwords(self, lora_stack):
-        triggerwords_list = []
+        lora_names = []
         for item in lora_stack:
             lora_name = item[0] if isinstance(item, (tuple, list)) and item else None
             if lora_name and lora_name != "None":
-                try:
-                    metadata = get_lora_metadata(lora_name)
-                    tw = metadata.get("triggerWords", "")
-                    if tw:
-                        triggerwords_list.append(tw)
-                except Exception as e:
-                    print(f"Error processing '{lora_name}': {e}")
+                lora_names.append(lora_name)
+
+        resolved = get_lora_metadata_many(lora_names)
+        triggerwords_list = []
+        for lora_name in lora_names:
+            metadata = resolved[lora_name]
+            if isinstance(metadata, Exception):
+                print(f"Error processing '{lora_name}': {metadata}")
+                continue
+            tw = metadata.get("triggerWords", "")
+            if tw:
+                triggerwords_list.append(tw)
         combined_triggerwords = ", ".join(triggerwords_list)
         return (combined_triggerwords,)
+
+
+class MangoTriggerCachePrune:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "dry_run": ("BOOLEAN", {"default": True, "tooltip": "Only report what would be removed."}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING",)
+    FUNCTION = "prune"
+    OUTPUT_NODE = True
+    CATEGORY = "Mango Node Pack/Metadata"
+    DESCRIPTION = "Removes trigger-word cache entries for LoRA files that no longer exist."
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        return float("nan")
+
+    def prune(self, dry_run=True):
+        pruned = prune_lora_metadata(dry_run=dry_run)
+        verb = "Would remove" if dry_run else "Removed"
+        report = f"{verb} {len(pruned)} stale entries"
+        if pruned:
+            report += ":\n" + "\n".join(sorted(pruned))
+        print(f"[MangoTriggerCachePrune] {verb} {len(pruned)} stale entries")
+        return (report,)
@@ -1,4 +1,4 @@
-from .MangoTriggerExporter import MangoTriggerExporter
+from .MangoTriggerExporter import MangoTriggerExporter, MangoTriggerCachePrune
 from .KSamplerMango import KSamplerMango
 from .MangoLoader import MangoLoader
 from .ImageSaverMango import ImageSaverMango
@@ -10,10 +10,17 @@ from .FluxSamplerMango import FluxSamplerMango
 from .FluxGuidanceMango import FluxGuidanceMango
 from .MangoPromptSave import PromptSave
 from .MangoPromptLoad import MangoPromptLoad
+from .MangoPromptSearch import MangoPromptSearch
 from .LoraStackMango import LoraStackMango
+from .LoraStackDynamicMango import LoraStackDynamicMango
 from .MangoImageLoader import MangoImageLoader
 from .MangoLoader10Loras import MangoLoader10Loras
 from .MangoModelData import MangoModelData
+from .MangoHashing import start_warmup
+from .MangoPrefetch import install_prompt_handler
+
+start_warmup()
+install_prompt_handler()
 
 NODE_CLASS_MAPPINGS = {
     "MangoTriggerExporter":     MangoTriggerExporter,
@@ -28,10 +35,13 @@ NODE_CLASS_MAPPINGS = {
     "FluxGuidanceMango":        FluxGuidanceMango,
     "PromptSave":               PromptSave,
     "MangoPromptLoad":          MangoPromptLoad,
+    "MangoPromptSearch":        MangoPromptSearch,
     "LoraStackMango":           LoraStackMango,
+    "LoraStackDynamicMango":    LoraStackDynamicMango,
     "MangoImageLoader":         MangoImageLoader,
     "MangoLoader10Loras":       MangoLoader10Loras,
     "MangoModelData":           MangoModelData,
+    "MangoTriggerCachePrune":   MangoTriggerCachePrune,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -47,8 +57,11 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "FluxGuidanceMango":         "FluxGuidance (Mango)",
     "PromptSave":                "Save Prompt (Mango)",
     "MangoPromptLoad":           "Load Prompt (Mango)",
+    "MangoPromptSearch":         "Prompt Search (Mango)",
     "LoraStackMango":            "LoRA Stack (Mango)",
+    "LoraStackDynamicMango":     "LoRA Stack Dynamic (Mango)",
     "MangoImageLoader":          "Image Loader (Mango)",
     "MangoLoader10Loras":        "Loader (Mango + 10 Loras)",
     "MangoModelData":            "Model Data (Mango)",
+    "MangoTriggerCachePrune":    "Trigger Cache Prune (Mango)",
 }
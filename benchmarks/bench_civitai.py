@@ -0,0 +1,92 @@
+"""
+Exercise MangoCivitai against a local stand-in for the Civitai API.
+
+    python benchmarks/bench_civitai.py --loras 10 --latency 0.3
+
+Starts a threaded HTTP server on localhost that answers
+/api/v1/model-versions/by-hash/<hash> after an artificial delay, then compares
+serial lookups (one request at a time, as before) with lookup_many(), and
+checks that duplicate hashes are coalesced into a single request.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MangoCivitai import CivitaiClient  # noqa: E402
+
+
+class StandIn(BaseHTTPRequestHandler):
+    latency = 0.3
+    hits = 0
+    lock = threading.Lock()
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with StandIn.lock:
+            StandIn.hits += 1
+        time.sleep(self.latency)
+        hash_value = self.path.rsplit("/", 1)[-1]
+        if hash_value.startswith("0"):
+            body, status = b'{"error": "Model not found"}', 404
+        else:
+            body, status = json.dumps({"trainedWords": [f"word_{hash_value[:6]}"]}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loras", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--parallel", type=int, default=4)
+    args = parser.parse_args()
+
+    StandIn.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(args.loras)]
+
+    try:
+        client = CivitaiClient(base_url=base_url, max_parallel=1)
+        start = time.perf_counter()
+        for h in hashes:
+            client.model_version_by_hash(h)
+        serial = time.perf_counter() - start
+        print(f"serial      {len(hashes)} lookups: {serial:6.2f}s")
+
+        client = CivitaiClient(base_url=base_url, max_parallel=args.parallel)
+        start = time.perf_counter()
+        results = client.lookup_many(hashes)
+        concurrent = time.perf_counter() - start
+        print(f"lookup_many {len(hashes)} lookups: {concurrent:6.2f}s  ({serial / concurrent:.1f}x, parallel={args.parallel})")
+        assert all(isinstance(r, dict) for r in results.values())
+
+        StandIn.hits = 0
+        client = CivitaiClient(base_url=base_url, max_parallel=args.parallel)
+        threads = [threading.Thread(target=client.model_version_by_hash, args=(hashes[0],)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"8 concurrent lookups of one hash -> {StandIn.hits} HTTP request(s)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare the old 4 KiB hashing loop with MangoHashing.hash_file.
+
+    python benchmarks/bench_hashing.py --sizes 100M,1G,4G --dir /path/on/model/disk
+
+Files are created once with random data and reused between runs. The first
+pass over each file also warms the page cache, so every method is timed on
+the same (cached) data; drop caches between runs to measure cold reads.
+"""
+
+import os
+import sys
+import time
+import zlib
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MangoHashing  # noqa: E402
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def make_file(directory, size):
+    path = os.path.join(directory, f"mango_bench_{size}.bin")
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+    block = os.urandom(16 * 1024 * 1024)
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            n = min(remaining, len(block))
+            f.write(block[:n])
+            remaining -= n
+    return path
+
+
+def legacy_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def legacy_sha256_and_crc32(path):
+    # What it cost before to get SHA-256 plus a second digest: two reads.
+    sha = legacy_sha256(path)
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            crc = zlib.crc32(chunk, crc)
+    return sha, f"{crc & 0xFFFFFFFF:08X}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100M", help="Comma separated file sizes, e.g. 100M,1G,4G")
+    parser.add_argument("--dir", default=".", help="Where to create the synthetic files")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic files afterwards")
+    args = parser.parse_args()
+
+    extra = ("crc32", "blake3") if MangoHashing.blake3 else ("crc32",)
+    methods = [
+        ("legacy 4 KiB sha256", legacy_sha256),
+        ("hash_file sha256", lambda p: MangoHashing.hash_file(p)),
+        ("legacy sha256 + crc32 (2 reads)", legacy_sha256_and_crc32),
+        (f"hash_file sha256+{'+'.join(extra)} (1 read)", lambda p: MangoHashing.hash_file(p, ("sha256",) + extra)),
+    ]
+    if hasattr(hashlib, "file_digest"):
+        def file_digest(p):
+            with open(p, "rb") as f:
+                return hashlib.file_digest(f, "sha256").hexdigest()
+        methods.insert(2, ("hashlib.file_digest sha256", file_digest))
+
+    for size in (parse_size(s) for s in args.sizes.split(",")):
+        path = make_file(args.dir, size)
+        legacy_sha256(path)  # warm the page cache
+        print(f"\n{size / 2**20:.0f} MiB ({path})")
+        for name, fn in methods:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn(path)
+                best = min(best, time.perf_counter() - start)
+            print(f"  {name:<40} {best:8.3f}s  {size / 2**20 / best:8.0f} MiB/s")
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+File size and encode time of ImageSaverMango's output formats.
+
+    python benchmarks/bench_image_formats.py --size 1024 --count 4
+
+Every variant embeds the same A1111 parameters string (PNG text chunk or
+EXIF UserComment). Sizes are averages over --count images; times are the
+best of --repeat runs per image.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+from PIL import PngImagePlugin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MangoImageWriter import build_exif, save_jpeg, save_png, save_webp  # noqa: E402
+from bench_image_writer import make_batch  # noqa: E402
+
+PARAMETERS = (
+    "a photo of a ripe mango on a wooden table, soft light\n"
+    "Negative prompt: blurry, lowres\n"
+    "Steps: 30, Sampler: euler, CFG scale: 7.0, Seed: 123456789, Scheduler: normal, Denoise: 1.0, "
+    "Model: sdxl.safetensors, Model hash: 31e35c80fc"
+)
+
+
+def variants():
+    exif = build_exif(PARAMETERS)
+    pnginfo = PngImagePlugin.PngInfo()
+    pnginfo.add_text("parameters", PARAMETERS)
+    return [
+        ("png level 4", "png", lambda a, p: save_png(a, p, pnginfo, 4)),
+        ("png level 1", "png", lambda a, p: save_png(a, p, pnginfo, 1)),
+        ("webp q90", "webp", lambda a, p: save_webp(a, p, exif, 90, False, 4)),
+        ("webp q80 effort 6", "webp", lambda a, p: save_webp(a, p, exif, 80, False, 6)),
+        ("webp lossless", "webp", lambda a, p: save_webp(a, p, exif, 80, True, 4)),
+        ("jpeg q90", "jpg", lambda a, p: save_jpeg(a, p, exif, 90)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--count", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    images = make_batch(args.count, args.size)
+    out_dir = tempfile.mkdtemp(prefix="mango-formats-")
+    print(f"{args.count} images of {args.size}px")
+    print(f"{'format':<20} {'size':>10} {'vs png':>7} {'encode':>9}")
+    png_size = None
+    try:
+        for label, ext, save in variants():
+            sizes, times = [], []
+            for i, arr in enumerate(images):
+                path = os.path.join(out_dir, f"img_{i}.{ext}")
+                best = float("inf")
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    save(arr, path)
+                    best = min(best, time.perf_counter() - t0)
+                times.append(best)
+                sizes.append(os.path.getsize(path))
+            size = sum(sizes) / len(sizes)
+            png_size = png_size or size
+            print(f"{label:<20} {size / 1024:>8.0f}KB {size / png_size:>6.0%} {sum(times) / len(times) * 1000:>7.0f}ms")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
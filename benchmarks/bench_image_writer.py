@@ -0,0 +1,94 @@
+"""
+End-to-end prompt throughput with inline vs background (async) image saving.
+
+    python benchmarks/bench_image_writer.py --prompts 8 --batch 4 --size 1024 --sample-ms 1500
+
+Each simulated prompt "samples" for --sample-ms (a sleep, standing in for
+the GPU), then saves its batch as PNGs the way ImageSaverMango does. Inline,
+the next prompt waits for every write. With async saving, writes overlap the
+next prompt's sampling. The async timing includes the final flush.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import PngImagePlugin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MangoImageWriter import ImageWriter, save_png  # noqa: E402
+
+
+def make_batch(batch, size, seed=0):
+    # Smooth gradients plus noise compress roughly like generated images.
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    base = np.stack([x, y, (x + y) / 2], axis=-1)
+    return [
+        np.clip((base + rng.normal(0, 0.04, base.shape)) * 255, 0, 255).astype(np.uint8)
+        for _ in range(batch)
+    ]
+
+
+def pnginfo():
+    info = PngImagePlugin.PngInfo()
+    info.add_text("parameters", "a photo of a mango\nNegative prompt: blurry\nSteps: 20, Seed: 1")
+    return info
+
+
+def run(images, prompts, sample_s, out_dir, writer=None):
+    started = time.perf_counter()
+    n = 0
+    for _ in range(prompts):
+        time.sleep(sample_s)
+        for arr in images:
+            path = os.path.join(out_dir, f"bench_{n:05d}.png")
+            n += 1
+            if writer is None:
+                save_png(arr, path, pnginfo(), 4)
+            else:
+                writer.submit(save_png, arr.copy(), path, pnginfo(), 4, label=path)
+    if writer is not None:
+        writer.flush()
+        errors = writer.pop_errors()
+        assert not errors, errors
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--sample-ms", type=float, default=1500)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=16)
+    args = parser.parse_args()
+
+    images = make_batch(args.batch, args.size)
+    out_dir = tempfile.mkdtemp(prefix="mango-writer-")
+    try:
+        t0 = time.perf_counter()
+        save_png(images[0], os.path.join(out_dir, "probe.png"), pnginfo(), 4)
+        encode_s = time.perf_counter() - t0
+        print(f"{args.prompts} prompts x {args.batch} images of {args.size}px, "
+              f"{args.sample_ms:.0f} ms sampling, {encode_s * 1000:.0f} ms per PNG")
+
+        sample_s = args.sample_ms / 1000
+        inline = run(images, args.prompts, sample_s, out_dir)
+        writer = ImageWriter(workers=args.threads, max_pending=args.queue)
+        background = run(images, args.prompts, sample_s, out_dir, writer)
+        for label, secs in (("inline", inline), ("async", background)):
+            print(f"{label:<8} {secs:7.2f}s  {args.prompts / secs:6.3f} prompts/s")
+        print(f"speedup  {inline / background:.2f}x")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare the old os.walk subfolder listing in MangoImageLoader INPUT_TYPES
+with the shared MangoListing.DirectoryIndex.
+
+    python benchmarks/bench_listing.py --files 100000 --dirs 200 --dir /tmp/mango-listing
+
+The synthetic tree is created once and reused between runs. Each "refresh"
+is what one /object_info request costs for the image loader's subfolder
+list.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MangoListing import DirectoryIndex  # noqa: E402
+
+
+def build_tree(root, files, dirs):
+    marker = os.path.join(root, f".tree-{files}-{dirs}")
+    if os.path.exists(marker):
+        return
+    print(f"Creating {files} files in {dirs} folders under {root} ...")
+    for d in range(dirs):
+        folder = os.path.join(root, f"{d // 20:03d}", f"batch_{d:04d}")
+        os.makedirs(folder, exist_ok=True)
+        for i in range(d, files, dirs):
+            ext = ".txt" if i % 10 == 0 else ".png"
+            open(os.path.join(folder, f"ComfyUI_{i:06d}_{ext}"), "wb").close()
+    open(marker, "wb").close()
+
+
+def old_listing(output_dir):
+    subfolders = []
+    for root, dirs, _ in os.walk(output_dir):
+        for d in dirs:
+            subfolders.append(os.path.relpath(os.path.join(root, d), output_dir))
+    return sorted(subfolders)
+
+
+def index_listing(index):
+    index.refresh(force=True)
+    return index.subdirectories()
+
+
+def timed(label, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<34} {best * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--dirs", type=int, default=200)
+    parser.add_argument("--dir", default="/tmp/mango-listing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    build_tree(args.dir, args.files, args.dirs)
+    # Let the fresh directory mtimes age past the racy window.
+    time.sleep(2.1)
+
+    expected = timed("os.walk (old INPUT_TYPES)", lambda: old_listing(args.dir), args.repeat)
+    cold = timed("DirectoryIndex, cold", lambda: index_listing(DirectoryIndex(args.dir)), args.repeat)
+    index = DirectoryIndex(args.dir)
+    index_listing(index)
+    warm = timed("DirectoryIndex, unchanged tree", lambda: index_listing(index), args.repeat)
+
+    folder = os.path.join(args.dir, "000", "batch_0000")
+
+    def one_new_file():
+        open(os.path.join(folder, f"new_{time.time_ns()}.png"), "wb").close()
+        return index_listing(index)
+
+    timed("DirectoryIndex, one new file", one_new_file, args.repeat)
+
+    assert cold == expected and warm == expected, "index listing differs from os.walk"
+    print(f"{len(expected)} subfolders; listings match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Serial vs concurrent PNG encoding of one batch, as in ImageSaverMango.
+
+    python benchmarks/bench_png_encode.py --batches 1,4,8,16 --levels 1,4,6,9 --size 1024
+
+Images are written to a temporary folder (use --dir to put it on the real
+output disk). Concurrency comes from MangoImageWriter.ENCODE_POOL, sized by
+MANGO_ENCODE_THREADS; the speedup is bounded by the number of cores.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+from PIL import PngImagePlugin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MangoImageWriter import ENCODE_POOL, ENCODE_THREADS, save_png  # noqa: E402
+from bench_image_writer import make_batch  # noqa: E402
+
+
+def encode_batch(images, out_dir, level, parallel):
+    paths = [os.path.join(out_dir, f"img_{i:05d}.png") for i in range(len(images))]
+    t0 = time.perf_counter()
+    if parallel:
+        futures = [ENCODE_POOL.submit(save_png, arr, p, PngImagePlugin.PngInfo(), level) for arr, p in zip(images, paths)]
+        for f in futures:
+            f.result()
+    else:
+        for arr, p in zip(images, paths):
+            save_png(arr, p, PngImagePlugin.PngInfo(), level)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", default="1,4,8,16")
+    parser.add_argument("--levels", default="1,4,6,9")
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+
+    batches = [int(b) for b in args.batches.split(",")]
+    levels = [int(level) for level in args.levels.split(",")]
+    images = make_batch(max(batches), args.size)
+    out_dir = tempfile.mkdtemp(prefix="mango-encode-", dir=args.dir)
+    print(f"{args.size}px images, {ENCODE_THREADS} encode threads, {os.cpu_count()} CPUs")
+    print(f"{'batch':>5} {'level':>5} {'serial':>10} {'parallel':>10} {'speedup':>8}")
+    try:
+        for level in levels:
+            for batch in batches:
+                serial = encode_batch(images[:batch], out_dir, level, parallel=False)
+                parallel = encode_batch(images[:batch], out_dir, level, parallel=True)
+                print(f"{batch:>5} {level:>5} {serial * 1000:>8.0f}ms {parallel * 1000:>8.0f}ms {serial / parallel:>7.2f}x")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
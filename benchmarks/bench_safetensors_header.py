@@ -0,0 +1,107 @@
+"""
+Time header-only LoRA metadata reads over a folder of LoRAs.
+
+    python benchmarks/bench_safetensors_header.py --dir /path/to/models/loras
+    python benchmarks/bench_safetensors_header.py --synthetic 300
+
+With --synthetic N, N fake SDXL-sized LoRA files (real header layout, zeroed
+tensor data) are generated in a temporary folder. If the safetensors package
+is installed, safe_open(framework="pt") is timed for comparison.
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MangoSafetensors  # noqa: E402
+
+try:
+    from safetensors import safe_open
+except ImportError:
+    safe_open = None
+
+
+def write_synthetic_lora(path, modules=700, rank=16, dim=640):
+    header = {
+        "__metadata__": {
+            "ss_network_dim": str(rank),
+            "ss_network_alpha": str(rank / 2),
+            "ss_base_model_version": "sdxl_base_v1-0",
+            "ss_tag_frequency": json.dumps({"10_mango": {"mango": 40, "1girl": 25, "solo": 20}}),
+            "modelspec.trigger_phrase": "mango",
+        }
+    }
+    offset = 0
+    for i in range(modules):
+        for part, shape in (("lora_down", [rank, dim]), ("lora_up", [dim, rank])):
+            size = shape[0] * shape[1] * 2
+            header[f"lora_unet_block_{i}.{part}.weight"] = {
+                "dtype": "F16", "shape": shape, "data_offsets": [offset, offset + size],
+            }
+            offset += size
+        header[f"lora_unet_block_{i}.alpha"] = {"dtype": "F16", "shape": [], "data_offsets": [offset, offset + 2]}
+        offset += 2
+    raw = json.dumps(header).encode("utf-8")
+    raw += b" " * (-len(raw) % 8)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(raw)))
+        f.write(raw)
+        f.truncate(8 + len(raw) + offset)
+
+
+def time_over(paths, fn):
+    start = time.perf_counter()
+    for p in paths:
+        fn(p)
+    return time.perf_counter() - start
+
+
+def safe_open_metadata(path):
+    with safe_open(path, framework="pt", device="cpu") as f:
+        return f.metadata() or {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="Folder of existing .safetensors LoRAs")
+    parser.add_argument("--synthetic", type=int, default=300, help="Number of synthetic LoRAs when --dir is not given")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.dir:
+        folder = args.dir
+    else:
+        tmp = folder = tempfile.mkdtemp(prefix="mango_lora_bench_")
+        for i in range(args.synthetic):
+            write_synthetic_lora(os.path.join(folder, f"lora_{i:04d}.safetensors"))
+
+    paths = sorted(
+        os.path.join(root, f)
+        for root, _, files in os.walk(folder)
+        for f in files if f.endswith(".safetensors")
+    )
+    print(f"{len(paths)} LoRAs in {folder}")
+    try:
+        t = time_over(paths, MangoSafetensors.read_safetensors_metadata)
+        print(f"  read_safetensors_metadata   {t:8.3f}s  {t / len(paths) * 1000:7.2f} ms/file")
+        t = time_over(paths, MangoSafetensors.summarize_lora)
+        print(f"  summarize_lora              {t:8.3f}s  {t / len(paths) * 1000:7.2f} ms/file")
+        if safe_open is not None:
+            t = time_over(paths, safe_open_metadata)
+            print(f"  safe_open(framework='pt')   {t:8.3f}s  {t / len(paths) * 1000:7.2f} ms/file")
+        else:
+            print("  safetensors not installed; skipping safe_open comparison")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Offline bulk LoRA indexer.
+
+Pre-populates the trigger-word store and the hash index for every LoRA so the
+first prompt that uses one doesn't stall on hashing and Civitai lookups.
+Run it from the ComfyUI directory (so ComfyUI's modules are importable):
+
+    python -m custom_nodes.MangoNodePack.index
+    python -m custom_nodes.MangoNodePack.index --workers 8 --offline
+    python -m custom_nodes.MangoNodePack.index --prune
+    python -m custom_nodes.MangoNodePack.index --import-prompts output/Prompts
+
+Each LoRA is committed as soon as it is done, so an interrupted run simply
+resumes: LoRAs that are already indexed and unchanged are skipped.
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import folder_paths
+from .MangoHashing import HASH_INDEX
+from .MangoTriggerExporter import get_lora_metadata, is_lora_metadata_fresh, prune_lora_metadata
+
+PROGRESS_INTERVAL = 2.0
+
+
+def _format_bytes(n):
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if n < 1024 or unit == "TiB":
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class _Progress:
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.indexed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, outcome, size=0):
+        with self._lock:
+            self.done += 1
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.bytes += size
+            now = time.perf_counter()
+            if now - self._last_report >= PROGRESS_INTERVAL or self.done == self.total:
+                self._last_report = now
+                self._report(now)
+
+    def _report(self, now):
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.indexed / elapsed
+        remaining = self.total - self.done
+        eta = f", ETA {remaining / rate:.0f}s" if rate and remaining else ""
+        print(
+            f"[index] {self.done}/{self.total} ({self.done / self.total:.0%}) - "
+            f"{self.indexed} indexed, {self.skipped} up to date, {self.failed} failed - "
+            f"{rate:.1f} LoRAs/s, {_format_bytes(self.bytes / elapsed)}/s{eta}",
+            flush=True,
+        )
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"[index] Finished in {elapsed:.1f}s: {self.indexed} indexed, {self.skipped} already up to date, "
+            f"{self.failed} failed; hashed {_format_bytes(self.bytes)} "
+            f"({_format_bytes(self.bytes / max(elapsed, 1e-9))}/s, {self.indexed / max(elapsed, 1e-9):.1f} LoRAs/s)"
+        )
+
+
+def _index_one(lora_name, query_api, progress):
+    try:
+        if is_lora_metadata_fresh(lora_name, query_api=query_api):
+            progress.record("skipped")
+            return
+        lora_path = folder_paths.get_full_path("loras", lora_name)
+        needs_hash = bool(lora_path) and HASH_INDEX.lookup(lora_path) is None
+        entry = get_lora_metadata(lora_name, query_api=query_api)
+        progress.record("indexed", entry.get("size", 0) if needs_hash else 0)
+    except Exception as e:
+        print(f"[index] Failed to index '{lora_name}': {e}")
+        progress.record("failed")
+
+
+def index_loras(workers=4, query_api=True):
+    lora_names = folder_paths.get_filename_list("loras")
+    if not lora_names:
+        print("[index] No LoRAs found.")
+        return None
+    print(f"[index] Indexing {len(lora_names)} LoRAs with {workers} workers"
+          f"{'' if query_api else ' (offline, Civitai not queried)'}")
+    progress = _Progress(len(lora_names))
+    with HASH_INDEX.deferred_saves(), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_index_one, name, query_api, progress) for name in lora_names]
+        try:
+            for fut in as_completed(futures):
+                fut.result()
+        except KeyboardInterrupt:
+            print("[index] Interrupted; finishing files in progress. Re-run to resume.")
+            for fut in futures:
+                fut.cancel()
+            raise
+    progress.summary()
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_nodes.MangoNodePack.index",
+        description="Pre-compute LoRA hashes and trigger words for MangoNodePack.",
+    )
+    parser.add_argument("--workers", type=int, default=max(2, min(8, os.cpu_count() or 4)),
+                        help="Number of LoRAs processed at once")
+    parser.add_argument("--offline", action="store_true",
+                        help="Only read headers and hash files; don't query Civitai")
+    parser.add_argument("--loras-dir", action="append", default=[],
+                        help="Extra LoRA folder to scan (may be repeated)")
+    parser.add_argument("--prune", action="store_true",
+                        help="Remove cache entries for LoRAs that no longer exist, then exit")
+    parser.add_argument("--import-prompts", metavar="DIR", action="append", default=[],
+                        help="Import .txt prompts under DIR into the prompt library, then exit (may be repeated)")
+    args = parser.parse_args(argv)
+
+    for path in args.loras_dir:
+        folder_paths.add_model_folder_path("loras", os.path.abspath(path))
+
+    if args.import_prompts:
+        from .MangoPromptStore import PROMPT_STORE
+        for path in args.import_prompts:
+            read, added = PROMPT_STORE.import_directory(os.path.abspath(path), folder_paths.get_output_directory())
+            print(f"[index] {path}: read {read} prompt files, added {added} new prompts")
+        return 0
+
+    if args.prune:
+        pruned = prune_lora_metadata()
+        print(f"[index] Removed {len(pruned)} stale entries")
+        return 0
+
+    try:
+        progress = index_loras(workers=max(1, args.workers), query_api=not args.offline)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if progress and progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())